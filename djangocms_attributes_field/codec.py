@@ -0,0 +1,117 @@
+import json
+import warnings
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .instrumentation import instrumented
+
+JSON_CODEC_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC'
+
+_codec = None
+
+
+class JSONCodec:
+    """
+    The default codec, using the `json` module of the standard library.
+
+    A codec provides `loads(str)` and `dumps(value)`, which returns a `str`.
+    Errors are raised as (subclasses of) `ValueError` and `TypeError`, just
+    like `json` does. Codecs may provide `dumps_canonical(value)`, returning
+    compact JSON with sorted keys, otherwise the one of `JSONCodec` is used.
+    """
+    loads = staticmethod(json.loads)
+    dumps = staticmethod(json.dumps)
+
+    @staticmethod
+    def dumps_canonical(value):
+        return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def _as_json_type(value):
+    # orjson reads the storage of dict subclasses directly, which does not
+    # hold the items of lazy or shared attributes, so subclasses of the JSON
+    # types are passed through and converted here.
+    if isinstance(value, dict):
+        return dict(value.items())
+    if isinstance(value, str):
+        # `str()` returns e.g. safe strings as they are
+        return str.__str__(value)
+    for json_type in (int, list):
+        if isinstance(value, json_type):
+            return json_type(value)
+    raise TypeError(f'Type is not JSON serializable: {type(value).__name__}')
+
+
+class ORJSONCodec:
+    """
+    A codec using `orjson <https://github.com/ijl/orjson>`_. Its output is
+    compact and not ASCII-escaped, but decodes to the same values.
+    """
+    def __init__(self):
+        import orjson
+
+        self.loads = orjson.loads
+        self._dumps = orjson.dumps
+        self._option = orjson.OPT_PASSTHROUGH_SUBCLASS
+        self._canonical_option = orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_SORT_KEYS
+
+    def dumps(self, value):
+        return self._dumps(value, default=_as_json_type, option=self._option).decode()
+
+    def dumps_canonical(self, value):
+        return self._dumps(value, default=_as_json_type, option=self._canonical_option).decode()
+
+
+def get_codec():
+    """
+    Returns the codec configured by ``DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC``,
+    the dotted path to a codec class or instance. Falls back to `JSONCodec` if
+    it is not set or cannot be imported (e.g., orjson is not installed).
+    """
+    global _codec
+
+    if _codec is None:
+        path = getattr(settings, JSON_CODEC_SETTING, None)
+        _codec = JSONCodec()
+        if path:
+            try:
+                codec = import_string(path)
+                _codec = codec() if isinstance(codec, type) else codec
+            except ImportError as exc:
+                warnings.warn(
+                    f'Cannot use {path} as JSON codec, falling back to json: {exc}',
+                    RuntimeWarning,
+                )
+    return _codec
+
+
+@instrumented('decode', size=lambda args, result: len(args[0]))
+def decode(value):
+    """
+    Decodes the JSON document `value` with the configured codec.
+    """
+    return get_codec().loads(value)
+
+
+@instrumented('encode')
+def encode(value, canonical=False):
+    """
+    Encodes `value` as a JSON document with the configured codec. With
+    `canonical`, the document is compact and its keys are sorted, so equal
+    values are encoded as equal strings.
+    """
+    codec = get_codec()
+    if canonical:
+        return getattr(codec, 'dumps_canonical', JSONCodec.dumps_canonical)(value)
+    return codec.dumps(value)
+
+
+@receiver(setting_changed)
+def _reset_codec(setting, **kwargs):
+    global _codec
+
+    if setting == JSON_CODEC_SETTING:
+        _codec = None
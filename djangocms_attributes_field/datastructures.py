@@ -0,0 +1,386 @@
+import copy
+from collections import OrderedDict
+from threading import Lock
+
+from .codec import decode, encode
+
+_JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _is_flat(value):
+    """
+    Returns whether `value` is a dict of strings to JSON scalars, i.e. one
+    that survives a JSON round trip unchanged.
+    """
+    return type(value) is dict and all(
+        type(key) is str and type(val) in _JSON_SCALAR_TYPES
+        for key, val in value.items()
+    )
+
+
+class LRUCache:
+    """
+    A small, thread-safe LRU mapping that counts its hits and misses.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+def _has_scalar_values(value):
+    return all(type(val) in _JSON_SCALAR_TYPES for val in value.values())
+
+
+class AttributesDict(dict):
+    """
+    A dict that remembers the JSON document it was loaded from in `raw`.
+
+    As long as it is not modified, `AttributesField` writes `raw` back to the
+    database as is instead of serializing the dict again. Any modification
+    resets `raw` to ``None``.
+
+    The rendered HTML (see `to_html`) and the canonical JSON are computed on
+    first use and kept until the next modification. Only values of JSON
+    scalars are kept, nested values could be modified in place.
+
+    `_stored` keeps the JSON document the value was loaded from even after
+    modifications, to tell whether it still matches the database.
+    """
+    __slots__ = ('raw', '_html', '_canonical_json', '_stored')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.raw = self._stored = None
+        self._html = self._canonical_json = None
+
+    def _modified(self):
+        self.raw = None
+        self._html = self._canonical_json = None
+
+    def to_html(self, excluded_keys=()):
+        """
+        Returns the attributes rendered for an HTML element, skipping every
+        key contained in `excluded_keys` (see `render_attributes`).
+        """
+        cached = self._html
+        if cached is not None and cached[0] == excluded_keys:
+            return cached[1]
+        from .rendering import render_attributes
+
+        html = render_attributes(self, excluded_keys)
+        if _has_scalar_values(self):
+            self._html = (excluded_keys, html)
+        return html
+
+    @property
+    def canonical_json(self):
+        """
+        The attributes as compact JSON with sorted keys.
+        """
+        if self._canonical_json is not None:
+            return self._canonical_json
+        canonical_json = encode(self, canonical=True)
+        if _has_scalar_values(self):
+            self._canonical_json = canonical_json
+        return canonical_json
+
+    def freeze(self):
+        """
+        Returns an immutable and hashable copy.
+        """
+        frozen = FrozenAttributesDict(self)
+        frozen.raw = self.raw
+        return frozen
+
+    def __setitem__(self, key, value):
+        self._modified()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._modified()
+        super().__delitem__(key)
+
+    def __ior__(self, other):
+        self._modified()
+        return super().__ior__(other)
+
+    def clear(self):
+        self._modified()
+        super().clear()
+
+    def pop(self, *args):
+        self._modified()
+        return super().pop(*args)
+
+    def popitem(self):
+        self._modified()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._modified()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._modified()
+        super().update(*args, **kwargs)
+
+    def __copy__(self):
+        clone = self.__class__(self)
+        clone.raw, clone._stored, clone._canonical_json = self.raw, self._stored, self._canonical_json
+        return clone
+
+    def __deepcopy__(self, memo):
+        if self.raw is not None and _has_scalar_values(self):
+            # Nothing to copy deeply, e.g. when django CMS copies plugins.
+            return self.__copy__()
+        clone = self.__class__(copy.deepcopy(dict(self), memo))
+        clone.raw, clone._stored = self.raw, self._stored
+        return clone
+
+    @classmethod
+    def from_json(cls, raw):
+        """
+        Returns the attributes of the JSON document `raw`, which is only
+        decoded when accessed. Until modified, they are saved as `raw`, e.g.
+        with `bulk_create` or `bulk_update`, without encoding them again.
+        `raw` is trusted to contain valid attributes, e.g. those of another
+        row read as text.
+        """
+        value = LazyAttributesDict(raw)
+        # Not loaded from the row it is assigned to, so always written.
+        value._stored = None
+        return value
+
+
+# Placeholder item of a `LazyAttributesDict` that was not decoded yet, so code
+# reading the dict storage directly (e.g., the C json encoder) does not treat
+# it as empty but falls back to the (decoding) Python methods.
+_NOT_LOADED = object()
+
+
+class LazyAttributesDict(AttributesDict):
+    """
+    An `AttributesDict` that only decodes its JSON document on first access.
+
+    Once decoded, the instance turns into a plain `AttributesDict`. Copies and
+    pickles of a dict that was not decoded yet stay lazy.
+
+    Until then, the dict storage only holds a placeholder item. Everything
+    going through the methods of the instance decodes it first, including
+    ``dict(value)``, ``{**value}`` and the C json encoder. Code reading the
+    storage directly does not and sees the placeholder, e.g. unbound
+    ``dict`` methods such as ``dict.items(value)`` or ``dict.get(value,
+    key)`` and C extensions that do not call the methods of dict subclasses
+    (like orjson without ``OPT_PASSTHROUGH_SUBCLASS``). Access the instance
+    (e.g., ``len(value)``) or pass ``dict(value)`` to such code.
+    """
+    __slots__ = ()
+
+    def __init__(self, raw):
+        dict.__init__(self, ((_NOT_LOADED, None),))
+        self._modified()
+        self.raw = self._stored = raw
+
+    def _load(self):
+        value = decode(self.raw)
+        dict.clear(self)
+        dict.update(self, value)
+        self.__class__ = AttributesDict
+        if not _has_scalar_values(self):
+            # Nested values could be modified without resetting `raw`.
+            self.raw = self._canonical_json = None
+
+    def __eq__(self, other):
+        self._load()
+        return dict.__eq__(self, _comparable(other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __copy__(self):
+        clone = self.__class__(self.raw)
+        clone._stored, clone._canonical_json = self._stored, self._canonical_json
+        return clone
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __reduce__(self):
+        return self.__class__, (self.raw,)
+
+
+def _loading(name):
+    def method(self, *args, **kwargs):
+        self._load()
+        return getattr(self, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+_READ_METHODS = (
+    '__contains__', '__getitem__', '__iter__', '__len__', '__reversed__',
+    '__repr__', '__or__', '__ror__', 'copy', 'get', 'items', 'keys', 'values',
+)
+_WRITE_METHODS = (
+    '__ior__', '__setitem__', '__delitem__', 'clear', 'pop', 'popitem',
+    'setdefault', 'update',
+)
+
+for _name in _READ_METHODS + _WRITE_METHODS:
+    setattr(LazyAttributesDict, _name, _loading(_name))
+
+
+# Key of the item of a `SharedAttributesDict` that holds the shared dict.
+_SHARED = object()
+
+
+class SharedAttributesDict(AttributesDict):
+    """
+    A read-only view of a dict shared by all values loaded from the same JSON
+    document (see `djangocms_attributes_field.interning`). The first
+    modification copies the shared dict, the instance then turns into a
+    plain `AttributesDict`. Copies and pickles stay shared.
+    """
+    __slots__ = ()
+
+    def __init__(self, shared, raw):
+        # Kept as the only item, like the placeholder of `LazyAttributesDict`
+        # as the layout of the class cannot change.
+        dict.__init__(self, ((_SHARED, shared),))
+        self._modified()
+        self.raw = self._stored = raw
+
+    @property
+    def shared(self):
+        return dict.__getitem__(self, _SHARED)
+
+    def to_html(self, excluded_keys=()):
+        return self.shared.to_html(excluded_keys)
+
+    @property
+    def canonical_json(self):
+        return self.shared.canonical_json
+
+    def _unshare(self):
+        shared = self.shared
+        dict.clear(self)
+        dict.update(self, shared)
+        self.__class__ = AttributesDict
+
+    def __eq__(self, other):
+        return self.shared == _comparable(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self.__class__(self.shared, self.raw)
+
+    def __deepcopy__(self, memo):
+        # Values are JSON scalars, so a copy can share them.
+        return self.__class__(self.shared, self.raw)
+
+    def __reduce__(self):
+        from .interning import intern_attributes
+
+        return intern_attributes, (self.raw,)
+
+
+class FrozenAttributesDict(AttributesDict):
+    """
+    An immutable and hashable `AttributesDict`, e.g. the dicts shared by
+    `SharedAttributesDict` values. Its hash is computed on first use.
+    """
+    __slots__ = ('_hash',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hash = None
+
+    def _modified(self):
+        raise TypeError(f"'{self.__class__.__name__}' object is immutable")
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self.items()))
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return _frozen, (dict(self), self.raw)
+
+
+def _frozen(value, raw):
+    frozen = FrozenAttributesDict(value)
+    frozen.raw = raw
+    return frozen
+
+
+def _comparable(value):
+    """
+    Returns `value` in a form whose dict storage can be compared directly.
+    """
+    if isinstance(value, LazyAttributesDict):
+        value._load()
+    elif isinstance(value, SharedAttributesDict):
+        return value.shared
+    return value
+
+
+def _shared(name):
+    def method(self, *args, **kwargs):
+        return getattr(self.shared, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _unsharing(name):
+    def method(self, *args, **kwargs):
+        self._unshare()
+        return getattr(self, name)(*args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+for _name in _READ_METHODS:
+    setattr(SharedAttributesDict, _name, _shared(_name))
+for _name in _WRITE_METHODS:
+    setattr(SharedAttributesDict, _name, _unsharing(_name))
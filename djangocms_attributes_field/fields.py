@@ -1,14 +1,37 @@
+import copy
+import functools
+import hashlib
 import json
 import re
-from functools import partial
 
 from django import forms
+from django.core import checks
 from django.core.exceptions import ImproperlyConfigured, ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
-from django.utils.html import conditional_escape, mark_safe
+from django.db import connections, models, router
+from django.db.models import signals
+from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
+from .codec import decode, encode, get_codec
+from .datastructures import (
+    _JSON_SCALAR_TYPES,
+    AttributesDict,
+    LazyAttributesDict,
+    SharedAttributesDict,
+    _has_scalar_values,
+    _is_flat,
+)
+from .instrumentation import instrumented
+from .interning import intern_attributes
+from .limits import AttributesLimits, ExceededAttributes
+from .lookups import (
+    AttributesHasAnyKeys,
+    AttributesHasKey,
+    AttributesHasKeys,
+    AttributesKeyTransformFactory,
+)
+from .rendering import _render_key, render_attributes
 from .widgets import AttributesWidget
 
 regex_key_validator = RegexValidator(regex=r'^[a-z][-a-z0-9_:]*\Z',
@@ -18,18 +41,83 @@ default_excluded_keys = [
     "src", "href", "data", "action", "on*",
 ]
 
+
+class ExcludedKeysMatcher:
+    """
+    Pre-compiled, case-insensitive matcher for a list of excluded keys.
+
+    Exact keys are kept in a frozenset, keys ending with ``*`` are treated as
+    prefixes and checked with a single ``str.startswith`` call. Use it with the
+    ``in`` operator::
+
+        "onclick" in ExcludedKeysMatcher(["on*"])  # True
+
+    `fingerprint` identifies the configuration across processes, e.g. in
+    cache keys.
+    """
+    __slots__ = ('exact', 'prefixes', 'fingerprint')
+
+    def __init__(self, excluded_keys):
+        excluded_keys = {key.lower() for key in excluded_keys}
+        self.exact = frozenset(key for key in excluded_keys if not key.endswith('*'))
+        self.prefixes = tuple(sorted(key[:-1] for key in excluded_keys if key.endswith('*')))
+        self.fingerprint = json.dumps([sorted(self.exact), self.prefixes], separators=(',', ':'))
+
+    def __contains__(self, key):
+        key = key.lower()
+        return key in self.exact or key.startswith(self.prefixes)
+
+    def __eq__(self, other):
+        if not isinstance(other, ExcludedKeysMatcher):
+            return NotImplemented
+        return self.exact == other.exact and self.prefixes == other.prefixes
+
+    def __hash__(self):
+        return hash((self.exact, self.prefixes))
+
+    def __deepcopy__(self, memo):
+        # Immutable, so form field copies can share it.
+        return self
+
+
+@functools.lru_cache(maxsize=128)
+def _get_excluded_keys_matcher(excluded_keys):
+    return ExcludedKeysMatcher(list(excluded_keys) + default_excluded_keys)
+
+
+def get_excluded_keys_matcher(excluded_keys=()):
+    """
+    Returns the `ExcludedKeysMatcher` for `excluded_keys`, a list or a
+    comma-separated string, and the `default_excluded_keys`, like the one of
+    an `AttributesField`. Matchers are passed through.
+    """
+    if isinstance(excluded_keys, ExcludedKeysMatcher):
+        return excluded_keys
+    if isinstance(excluded_keys, str):
+        excluded_keys = excluded_keys.split(',')
+    return _get_excluded_keys_matcher(tuple(key.strip().lower() for key in excluded_keys if key.strip()))
+
+
 class AttributesFormField(forms.CharField):
     empty_values = [None, '']
 
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('widget', AttributesWidget)
         self.excluded_keys = kwargs.pop('excluded_keys', []) + default_excluded_keys
+        self.excluded_keys_matcher = ExcludedKeysMatcher(self.excluded_keys)
+        self.canonical = kwargs.pop('canonical', False)
+        self.limits = AttributesLimits(**{name: kwargs.pop(name, None) for name in AttributesLimits.__slots__})
         super().__init__(*args, **kwargs)
+        if self.limits:
+            self.widget.limits = self.limits
 
     def to_python(self, value):
+        if isinstance(value, ExceededAttributes):
+            # The widget rejected the submitted pairs
+            raise value.error
         if isinstance(value, str) and value:
             try:
-                return json.loads(value)
+                return decode(value)
             except ValueError as exc:
                 raise forms.ValidationError(
                     'JSON decode error: {}'.format(str(exc.args[0]))
@@ -37,14 +125,42 @@ class AttributesFormField(forms.CharField):
         else:
             return value
 
+    @instrumented('validate', size=lambda args, result: len(args[1]) if isinstance(args[1], dict) else 0)
     def validate(self, value):
         # This is required in older django versions.
         if value in self.empty_values and self.required:
             raise forms.ValidationError(self.error_messages['required'], code='required')
         if isinstance(value, dict):
+            if self.limits:
+                self.limits.check(value.items())
+            # Single pass over all items, collecting every error. JSON scalars
+            # are always serializable, only other values need to be checked.
+            errors = []
             for key, val in value.items():
-                self.validate_key(key)
-                self.validate_value(key, val)
+                try:
+                    self.validate_key(key)
+                    if type(val) not in _JSON_SCALAR_TYPES:
+                        self.validate_value(key, val)
+                except ValidationError as error:
+                    errors.append(error)
+            if errors:
+                raise ValidationError(errors)
+
+    def clean(self, value):
+        """
+        Returns the cleaned attributes as an `AttributesDict` that carries its
+        JSON serialization, so saving it does not need to serialize it again.
+        """
+        value = super().clean(value)
+        if type(value) is dict:
+            raw = encode(value, canonical=self.canonical)
+            value = AttributesDict(value)
+            # Nested values could be modified without resetting `raw`.
+            if _has_scalar_values(value):
+                value.raw = raw
+                if self.canonical:
+                    value._canonical_json = raw
+        return value
 
     def validate_key(self, key):
         """
@@ -55,11 +171,10 @@ class AttributesFormField(forms.CharField):
         :param key: (str) The key to validate
         """
         # Verify the key is not one of `excluded_keys`.
-        for excluded_key in self.excluded_keys:
-            if key.lower() == excluded_key or excluded_key.endswith("*") and key.lower().startswith(excluded_key[:-1]):
-                raise ValidationError(
-                    _('"{key}" is excluded by configuration and cannot be used as '
-                      'a key.').format(key=key))
+        if key in self.excluded_keys_matcher:
+            raise ValidationError(
+                _('"{key}" is excluded by configuration and cannot be used as '
+                  'a key.').format(key=key))
         # Also check that it fits our permitted syntax
         try:
             regex_key_validator(key)
@@ -79,13 +194,105 @@ class AttributesFormField(forms.CharField):
         :param value: (str) The value to validate
         """
         try:
-            json.dumps(value)
+            get_codec().dumps(value)
         except (TypeError, ValueError):
             raise ValidationError(
                 _('The value for the key "{key}" is invalid. Please enter a '
                   'value that can be represented in JSON.').format(key=key))
 
 
+class AttributesStrDescriptor:
+    """
+    The «name»_str accessor installed by `AttributesField.contribute_to_class`.
+    The field, and with it the pre-compiled excluded keys, is bound when the
+    model class is created, so accessing it does not need any `_meta` lookups.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return self.field.value_to_html(instance)
+
+    def __set__(self, instance, value):
+        raise AttributeError(f"can't set attribute '{self.field.name}_str'")
+
+
+@functools.lru_cache(maxsize=128)
+def _fingerprint_digest(fingerprint):
+    return _digest(fingerprint)
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+class RenderedAttributesField(models.TextField):
+    """
+    The «name»_rendered column added by `AttributesField(store_rendered=True)`
+    that holds the rendered attributes, ``NULL`` until they are rendered (or
+    while the attributes are ``NULL``).
+
+    The rendered attributes are prefixed with a digest of the excluded keys
+    and of the JSON they were rendered from, so they are not used after
+    either changed, e.g. with ``update()`` or ``bulk_update()``.
+    """
+    digest_length = 32
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('editable', False)
+        self.source_field = None
+        super().__init__(*args, **kwargs)
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        # Migrations declare the column explicitly, but it was already added
+        # by the AttributesField.
+        if not any(field.name == name for field in cls._meta.local_fields):
+            super().contribute_to_class(cls, name, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        if self.source_field is None:
+            return super().pre_save(model_instance, add)
+        value = self.render(model_instance)
+        setattr(model_instance, self.attname, value)
+        return value
+
+    def render(self, model_instance):
+        """
+        Returns the rendered attributes of `model_instance` to store, ``None``
+        if its attributes are ``None`` (with ``null=True``).
+        """
+        value = getattr(model_instance, self.source_field.attname)
+        if value is None:
+            return None
+        digest = self.get_digest(self.source_field.get_prep_value(value))
+        return '{}:{}'.format(digest, self.source_field.render_value(model_instance))
+
+    def get_digest(self, raw=None):
+        """
+        Returns the digest of the excluded keys of the attributes and their
+        JSON document `raw`, only of the excluded keys if `raw` is ``None``.
+        """
+        digest = _fingerprint_digest(self.source_field.excluded_keys_matcher.fingerprint)
+        if raw is None:
+            return digest
+        return digest + _digest(raw)
+
+    def get_html(self, stored, raw=None):
+        """
+        Returns the rendered attributes in the `stored` column value if they
+        were rendered from the JSON document `raw` with the current excluded
+        keys, otherwise ``None``. Only the excluded keys are checked if `raw`
+        is ``None``, e.g. for deferred attributes.
+        """
+        digest = self.get_digest(raw)
+        if not stored.startswith(digest) or stored[self.digest_length:self.digest_length + 1] != ':':
+            return None
+        return stored[self.digest_length + 1:]
+
+
 class AttributesField(models.Field):
     """
     This is an opinionated sub-class of JSONField. Here's a summary of the
@@ -99,7 +306,24 @@ class AttributesField(models.Field):
           of keys we do not accept and enforce this;
         * Validation checks for both key format and excluded_keys are done
           in a case-insensitive manner;
-        * The default widget is AttributesWidget from this package.
+        * The default widget is AttributesWidget from this package;
+        * With `native_json=True` the data is stored in the database's native
+          JSON type (e.g., jsonb on PostgreSQL, JSON1 checked text on SQLite)
+          instead of a text column;
+        * With `lazy=True` stored values are only decoded on first access,
+          untouched values are written back without serializing them again;
+        * With `canonical=True` values are stored as compact JSON with sorted
+          keys, so equal attributes are stored as equal strings;
+        * With `intern=True` values loaded from the same JSON document share
+          their data until they are modified;
+        * With `track_changes=True` instances remember the attributes they
+          were loaded with, so `is_dirty` and `get_update_fields` can tell
+          whether they changed;
+        * `max_keys`, `max_key_length`, `max_value_length` and `max_bytes`
+          limit the size of submitted attributes;
+        * With `store_rendered=True` the rendered attributes are stored in
+          the «name»_rendered column when saving, «name»_str reads them from
+          there.
     """
     default_error_messages = {
         'invalid': _("'%s' is not a valid JSON string.")
@@ -110,12 +334,55 @@ class AttributesField(models.Field):
         if not kwargs.get('null', False):
             kwargs['default'] = kwargs.get('default', dict)
         excluded_keys = kwargs.pop('excluded_keys', [])
+        self.native_json = kwargs.pop('native_json', False)
+        self.lazy = kwargs.pop('lazy', False)
+        self.canonical = kwargs.pop('canonical', False)
+        self.intern = kwargs.pop('intern', False)
+        self.track_changes = kwargs.pop('track_changes', False)
+        self.limits = AttributesLimits(**{name: kwargs.pop(name, None) for name in AttributesLimits.__slots__})
+        self.store_rendered = kwargs.pop('store_rendered', False)
+        self.rendered_field = None
         # Note we accept uppercase letters in the param, but the comparison
         # is not case-sensitive. So, we coerce the input to lowercase here.
         self.excluded_keys = [key.lower() for key in excluded_keys]
+        # Output filtering uses the same rules as the form field, including
+        # the always excluded `default_excluded_keys` and wildcards.
+        self.excluded_keys_matcher = ExcludedKeysMatcher(self.excluded_keys + default_excluded_keys)
+        self._default_cache = None
         super().__init__(*args, **kwargs)
         self.validate(self.get_default(), None)
 
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        if self.native_json:
+            errors.extend(self._check_native_json(kwargs.get('databases') or []))
+        return errors
+
+    def _check_native_json(self, databases):
+        errors = []
+        for db in databases:
+            if not router.allow_migrate_model(db, self.model):
+                continue
+            connection = connections[db]
+            if not connection.features.supports_json_field:
+                errors.append(
+                    checks.Error(
+                        f'{connection.display_name} does not support native JSON columns.',
+                        hint='Remove native_json=True from the AttributesField.',
+                        obj=self,
+                        id='djangocms_attributes_field.E001',
+                    )
+                )
+        return errors
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.native_json:
+            kwargs['native_json'] = True
+        if self.store_rendered:
+            kwargs['store_rendered'] = True
+        return name, path, args, kwargs
+
     def formfield(self, **kwargs):
         defaults = {
             'form_class': AttributesFormField,
@@ -123,6 +390,9 @@ class AttributesField(models.Field):
         }
         defaults.update(**kwargs)
         defaults["excluded_keys"] = self.excluded_keys
+        defaults["canonical"] = self.canonical
+        for name in AttributesLimits.__slots__:
+            defaults.setdefault(name, getattr(self.limits, name))
         return super().formfield(**defaults)
 
     def from_db_value(self, value, expression=None, connection=None):
@@ -134,32 +404,95 @@ class AttributesField(models.Field):
         if value is None:
             return None
         elif isinstance(value, str):
-            return json.loads(value)
+            if self.intern and value[:1] == '{':
+                decoded = intern_attributes(value)
+                if isinstance(decoded, SharedAttributesDict):
+                    return decoded
+                # Not shared, e.g. with nested values
+            elif self.lazy and value[:1] == '{':
+                return LazyAttributesDict(value)
+            else:
+                decoded = decode(value)
+            if type(decoded) is dict:
+                decoded = AttributesDict(decoded)
+                decoded._stored = value
+                # Nested values could be modified without resetting `raw`.
+                if _has_scalar_values(decoded):
+                    decoded.raw = value
+            return decoded
+        elif type(value) is dict:
+            return AttributesDict(value)
         else:
             return value
 
     def get_db_prep_value(self, value, connection=None, prepared=None):
         return self.get_prep_value(value)
 
+    def get_placeholder(self, value, compiler, connection):
+        # The serialized JSON is passed as text, PostgreSQL needs an explicit
+        # cast for jsonb columns (e.g., with server-side parameter binding).
+        if self.native_json and connection.vendor == 'postgresql':
+            return '%s::jsonb'
+        return '%s'
+
     def get_prep_value(self, value):
         if value is None:
             if not self.null and self.blank:
-                return ""
+                # An empty string is not a valid JSON document.
+                return "{}" if self.native_json else ""
             return None
-        return json.dumps(value)
+        if isinstance(value, AttributesDict):
+            # Unmodified since it was loaded, no need to serialize again.
+            # Canonical fields only write back the JSON of a row as is (rows
+            # stored before are converted by the canonicalize_attributes
+            # command), not e.g. that of `from_json`.
+            if value.raw is not None and (not self.canonical or value.raw is value._stored):
+                return value.raw
+            if self.canonical:
+                return value.canonical_json
+        return encode(value, canonical=self.canonical)
 
     def get_default(self):
         if self.has_default():
-            default = self.default
-            if callable(default):
-                default = default()
-            if isinstance(default, str):
-                return json.loads(default)
-            return json.loads(json.dumps(default))
+            if callable(self.default):
+                return self._copy_default(self._normalize_default(self.default()))
+            # Static defaults are normalized once (and again only if
+            # `self.default` is replaced), each instance gets a copy.
+            if self._default_cache is None or self._default_cache[0] is not self.default:
+                self._default_cache = (self.default, self._normalize_default(self.default))
+            return self._copy_default(self._default_cache[1])
         return super().get_default()
 
+    @staticmethod
+    def _normalize_default(default):
+        """
+        Returns `default` as it would be loaded from the database.
+        """
+        codec = get_codec()
+        if isinstance(default, str):
+            return codec.loads(default)
+        if _is_flat(default):
+            return default
+        return codec.loads(codec.dumps(default))
+
+    @staticmethod
+    def _copy_default(default):
+        if _is_flat(default):
+            return dict(default)
+        return copy.deepcopy(default)
+
+    def get_transform(self, name):
+        """
+        Any name that is not a registered transform or lookup selects the key
+        of that name, e.g. ``attributes__target='_blank'``.
+        """
+        transform = super().get_transform(name)
+        if transform:
+            return transform
+        return AttributesKeyTransformFactory(name)
+
     def get_internal_type(self):
-        return 'TextField'
+        return 'JSONField' if self.native_json else 'TextField'
 
     def contribute_to_class(self, cls, name, **kwargs):
         """
@@ -167,11 +500,18 @@ class AttributesField(models.Field):
         the attributes ready for inclusion on an HTML element.
         """
         super().contribute_to_class(cls, name, **kwargs)
-        # Make sure we're not going to clobber something that already exists.
+        # Make sure we're not going to clobber something that already exists,
+        # apart from the accessor of the field copied from an abstract model.
         property_name = f'{name}_str'
-        if not hasattr(cls, property_name):
-            str_property = partial(self.to_str, field_name=name)
-            setattr(cls, property_name, property(str_property))
+        if not hasattr(cls, property_name) or isinstance(getattr(cls, property_name), AttributesStrDescriptor):
+            setattr(cls, property_name, AttributesStrDescriptor(self))
+        if self.track_changes and not cls._meta.abstract:
+            # Only then, as the receiver is called for every loaded instance.
+            signals.post_init.connect(self._record_loaded_value, sender=cls)
+        if self.store_rendered and not cls._meta.abstract:
+            self.rendered_field = RenderedAttributesField()
+            self.rendered_field.source_field = self
+            cls.add_to_class(f'{name}_rendered', self.rendered_field)
 
     def validate(self, value, model_instance):
         if not self.null and value is None:
@@ -189,16 +529,134 @@ class AttributesField(models.Field):
         """
         Emits stored attributes as a String suitable for for adding to an
         HTML element and performs an outbound filter of excluded_keys.
+
+        This is kept for compatibility, the «name»_str accessor added to the
+        model skips the field lookup and should be preferred.
         """
         # We are explicitly ignoring keys in `excluded_keys` here. The field
         # itself prevents *new* keys from being created that are configured in the
         # field parameter `excluded_keys`. This utility uses the same
         # configuration to prevent any keys in `excluded_keys` from *existing*
         # objects from being emitted.
+        return cls._get_str_field(obj, field_name).value_to_html(obj)
+
+    @classmethod
+    def to_str_many(cls, objs, field_name):
+        """
+        Batch version of `to_str`: returns a list with the rendered attributes
+        of each of `objs`, which may be instances of different models. Fields
+        are looked up once per model and identical attribute sets are only
+        rendered once.
+        """
+        fields = {}
+        rendered = {}
+        result = []
+        for obj in objs:
+            try:
+                field = fields[obj.__class__]
+            except KeyError:
+                field = fields[obj.__class__] = cls._get_str_field(obj, field_name)
+            stored = field.get_stored_html(obj)
+            if stored is not None:
+                result.append(stored)
+                continue
+            value = getattr(obj, field.attname)
+            key = _render_key(value)
+            if key is None:
+                result.append(render_attributes(value, field.excluded_keys_matcher))
+                continue
+            key = (field.excluded_keys_matcher, key)
+            try:
+                result.append(rendered[key])
+            except KeyError:
+                rendered[key] = render_attributes(value, field.excluded_keys_matcher)
+                result.append(rendered[key])
+        return result
+
+    @classmethod
+    def to_str_queryset(cls, queryset, field_name):
+        """
+        Returns a dict mapping the primary keys of the objects in `queryset` to
+        their rendered attributes (see `to_str_many`). Only the primary key and
+        the attributes (and their «name»_rendered column) are loaded.
+        """
+        field = queryset.model._meta.get_field(field_name)
+        names = [field_name]
+        if getattr(field, 'rendered_field', None) is not None:
+            names.append(field.rendered_field.name)
+        objs = list(queryset.only(*names))
+        return dict(zip((obj.pk for obj in objs), cls.to_str_many(objs, field_name)))
+
+    def _record_loaded_value(self, instance, **kwargs):
+        # The stored document is kept on the value, which could also be
+        # assigned to other instances, so the instance keeps the value it
+        # was loaded with.
+        value = instance.__dict__.get(self.attname)
+        if isinstance(value, AttributesDict) and value._stored is not None:
+            instance.__dict__[f'_{self.attname}_loaded'] = value
+
+    def get_loaded_value(self, obj):
+        """
+        Returns the attributes of `obj` if they are the ones it was loaded
+        with from the database (modified or not), otherwise ``None``, always
+        without `track_changes`.
+        """
+        value = obj.__dict__.get(self.attname)
+        if value is not None and obj.__dict__.get(f'_{self.attname}_loaded') is value:
+            return value
+        return None
+
+    def is_dirty(self, obj):
+        """
+        Returns whether the attributes of `obj` may differ from the stored
+        ones. Values that were reassigned, and all values of fields without
+        `track_changes`, are always considered dirty.
+        """
+        if self.attname not in obj.__dict__:
+            # Deferred, i.e. never loaded
+            return False
+        value = self.get_loaded_value(obj)
+        if value is None:
+            return True
+        if value.raw is not None:
+            return False
+        # Modified, or has nested values that may have been modified
+        return self.get_prep_value(value) != value._stored
+
+    @classmethod
+    def get_update_fields(cls, obj, update_fields=None):
+        """
+        Returns the names of `update_fields` (by default, all loaded fields of
+        `obj`) without the AttributesFields whose value did not change, to be
+        passed to ``obj.save(update_fields=...)``. Note that saving with an
+        empty list does not write anything. The «name»_rendered columns of
+        changed fields with `store_rendered=True` are added.
+        """
+        opts = obj._meta
+        if update_fields is None:
+            deferred = obj.get_deferred_fields()
+            update_fields = [
+                field.name for field in opts.concrete_fields
+                if not field.primary_key and field.attname not in deferred
+            ]
+        result = []
+        for name in update_fields:
+            field = opts.get_field(name)
+            if isinstance(field, RenderedAttributesField) and field.source_field is not None:
+                # Added with its AttributesField
+                continue
+            if isinstance(field, cls) and not field.is_dirty(obj):
+                continue
+            result.append(name)
+            if isinstance(field, cls) and field.rendered_field is not None:
+                result.append(field.rendered_field.name)
+        return result
 
+    @classmethod
+    def _get_str_field(cls, obj, field_name):
         if not hasattr(obj, field_name):
             raise ImproperlyConfigured(
-                _('"{field_name}" is not a field of {obj|r}').format(
+                _('"{field_name}" is not a field of {obj!r}').format(
                     obj=obj, field_name=field_name))
 
         opts = obj._meta
@@ -208,19 +666,70 @@ class AttributesField(models.Field):
             raise TypeError(
                 _('"{field_name}" is not an AttributesField').format(
                     field_name=field_name))
+        return field
 
-        excluded_keys = field.excluded_keys
-        value = getattr(obj, field_name)
-        try:
-            value_items = value.items()
-        except AttributeError:
-            value_items = [value]
-
-        attrs = []
-        for key, val in value_items:
-            if key.lower() not in excluded_keys:
-                if val:
-                    attrs.append(f'{key}="{conditional_escape(val)}"')
-                else:
-                    attrs.append(f'{key}')
-        return mark_safe(" ".join(attrs))
+    def get_stored_html(self, obj):
+        """
+        Returns the rendered attributes stored in the «name»_rendered column
+        of `obj`, or ``None`` if there are none, the attributes were modified
+        or the column was not rendered from them with the current excluded
+        keys.
+        """
+        if self.rendered_field is None:
+            return None
+        stored = obj.__dict__.get(self.rendered_field.attname)
+        if stored is None:
+            return None
+        raw = None
+        if self.attname in obj.__dict__:
+            # The JSON of unmodified attributes, also when assigned from
+            # another instance. Deferred attributes are not loaded for this,
+            # only the excluded keys are checked.
+            value = obj.__dict__[self.attname]
+            if not isinstance(value, AttributesDict) or value.raw is None:
+                return None
+            raw = value.raw
+        rendered = self.rendered_field.get_html(stored, raw)
+        if rendered is None:
+            return None
+        return mark_safe(rendered)
+
+    @instrumented('render')
+    def value_to_html(self, obj):
+        """
+        Returns the rendered attributes of `obj` (see `to_str`), read from
+        the «name»_rendered column with `store_rendered=True` while it is up
+        to date.
+        """
+        rendered = self.get_stored_html(obj)
+        if rendered is None:
+            rendered = self.render_value(obj)
+        return rendered
+
+    def render_value(self, obj):
+        """
+        Renders the attributes of `obj`. The result is cached on the instance
+        until the attributes are reassigned or mutated.
+        """
+        value = getattr(obj, self.attname)
+        if isinstance(value, AttributesDict):
+            # Loaded values keep their rendered output until modified.
+            return value.to_html(self.excluded_keys_matcher)
+        cache_name = f'_{self.attname}_str_cache'
+        key = _render_key(value)
+        if key is not None:
+            cached = obj.__dict__.get(cache_name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+        rendered = render_attributes(value, self.excluded_keys_matcher)
+        # Only plain string values are cached: e.g. `1` and `True` or safe
+        # and plain strings compare equal, but render differently.
+        if key is not None and all(type(val) is str for val in value.values()):
+            obj.__dict__[cache_name] = (key, rendered)
+        return rendered
+
+
+AttributesField.register_lookup(AttributesHasKey)
+AttributesField.register_lookup(AttributesHasKeys)
+AttributesField.register_lookup(AttributesHasAnyKeys)
@@ -0,0 +1,127 @@
+import functools
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
+
+INSTRUMENTATION_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_INSTRUMENTATION'
+
+# Instrumented operations: decoding and encoding the stored JSON, validating
+# submitted attributes, rendering «name»_str and rendering the admin widget.
+OPERATIONS = ('decode', 'encode', 'validate', 'render', 'widget_render')
+
+# Sent after each instrumented call while instrumentation is enabled, with the
+# operation as sender and the `duration` (seconds) and `size` of the call.
+attributes_measured = Signal()
+
+_enabled = None
+_stats = {}
+_lock = Lock()
+
+
+def is_enabled():
+    global _enabled
+
+    if _enabled is None:
+        _enabled = bool(getattr(settings, INSTRUMENTATION_SETTING, False))
+    return _enabled
+
+
+def enable():
+    """
+    Enables instrumentation regardless of the setting.
+    """
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """
+    Disables instrumentation regardless of the setting.
+    """
+    global _enabled
+    _enabled = False
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
+
+
+def get_stats():
+    """
+    Returns a dict mapping each operation to its number of ``calls``, their
+    cumulative ``time`` in seconds and cumulative ``size``. Sizes are the
+    length of the JSON document for ``decode`` and ``encode``, the number of
+    items for ``validate`` and the length of the HTML otherwise.
+
+    If the render cache is enabled, ``render_cache`` holds its ``hits``,
+    ``misses`` and current ``size``, ``intern_table`` does the same for the
+    table of interned attributes once it is used. ``shared_render_cache``
+    holds the ``hits`` and ``misses`` of the shared render cache of this
+    process.
+    """
+    from . import interning
+    from .rendering import get_render_cache, get_shared_render_cache
+
+    with _lock:
+        stats = {
+            operation: dict(_stats.get(operation, {'calls': 0, 'time': 0.0, 'size': 0}))
+            for operation in OPERATIONS
+        }
+    cache = get_render_cache()
+    if cache is not None:
+        stats['render_cache'] = {'hits': cache.hits, 'misses': cache.misses, 'size': len(cache)}
+    shared_cache = get_shared_render_cache()
+    if shared_cache is not None:
+        stats['shared_render_cache'] = {'hits': shared_cache.hits, 'misses': shared_cache.misses}
+    table = interning._intern_table
+    if table is not None:
+        stats['intern_table'] = {'hits': table.hits, 'misses': table.misses, 'size': len(table)}
+    return stats
+
+
+def _record(operation, duration, size):
+    with _lock:
+        stats = _stats.setdefault(operation, {'calls': 0, 'time': 0.0, 'size': 0})
+        stats['calls'] += 1
+        stats['time'] += duration
+        stats['size'] += size
+    attributes_measured.send(sender=operation, duration=duration, size=size)
+
+
+def _length(value):
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+def instrumented(operation, size=None):
+    """
+    Decorates a function or method to be measured as `operation`. `size(args,
+    result)` returns the payload size of a call, by default the length of the
+    result. While instrumentation is disabled, the only cost is a flag check.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_enabled if _enabled is not None else is_enabled()):
+                return func(*args, **kwargs)
+            start = perf_counter()
+            result = func(*args, **kwargs)
+            duration = perf_counter() - start
+            _record(operation, duration, size(args, result) if size else _length(result))
+            return result
+        return wrapper
+    return decorator
+
+
+@receiver(setting_changed)
+def _reset_instrumentation(setting, **kwargs):
+    global _enabled
+
+    if setting == INSTRUMENTATION_SETTING:
+        _enabled = None
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .codec import decode
+from .datastructures import (
+    FrozenAttributesDict,
+    LRUCache,
+    SharedAttributesDict,
+    _is_flat,
+)
+
+INTERN_TABLE_SIZE_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_INTERN_TABLE_SIZE'
+DEFAULT_INTERN_TABLE_SIZE = 1000
+
+_intern_table = None
+
+
+class InternTable(LRUCache):
+    """
+    A small, thread-safe LRU mapping of JSON documents to the decoded dicts
+    (as `FrozenAttributesDict`) shared by all values of
+    `AttributesField(intern=True)` fields loaded from them, or to ``False``
+    for documents that cannot be shared.
+    """
+
+
+def get_intern_table():
+    """
+    Returns the process-wide `InternTable`, its size can be configured with
+    ``DJANGOCMS_ATTRIBUTES_FIELD_INTERN_TABLE_SIZE``.
+    """
+    global _intern_table
+
+    if _intern_table is None:
+        _intern_table = InternTable(
+            getattr(settings, INTERN_TABLE_SIZE_SETTING, DEFAULT_INTERN_TABLE_SIZE)
+        )
+    return _intern_table
+
+
+@receiver(setting_changed)
+def _reset_intern_table(setting, **kwargs):
+    global _intern_table
+
+    if setting == INTERN_TABLE_SIZE_SETTING:
+        _intern_table = None
+
+
+def intern_attributes(raw):
+    """
+    Returns the JSON document `raw` decoded as a `SharedAttributesDict`
+    backed by the dict shared by all values decoded from the same document.
+    Only flat dicts (of JSON scalars) are shared, anything else is decoded as
+    usual (and remembered not to be shared).
+    """
+    table = get_intern_table()
+    shared = table.get(raw)
+    if shared is False:
+        return decode(raw)
+    if shared is None:
+        shared = decode(raw)
+        if not _is_flat(shared):
+            table.set(raw, False)
+            return shared
+        shared = FrozenAttributesDict(shared)
+        shared.raw = raw
+        table.set(raw, shared)
+    return SharedAttributesDict(shared, raw)
@@ -0,0 +1,57 @@
+from weakref import WeakKeyDictionary
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.utils import pass_context
+
+from .fields import get_excluded_keys_matcher
+from .rendering import render_merged_attributes
+
+# Outputs of each template render, dropped with its context
+_caches = WeakKeyDictionary()
+
+
+@pass_context
+def render_attributes(context, *values, excluded_keys=()):
+    """
+    Renders one or more attribute dicts like the ``{% render_attributes %}``
+    template tag of ``attributes_field_tags``.
+    """
+    try:
+        cache = _caches[context]
+    except KeyError:
+        cache = _caches[context] = {}
+    return render_merged_attributes(values, get_excluded_keys_matcher(excluded_keys), cache)
+
+
+class AttributesExtension(Extension):
+    """
+    Adds the ``render_attributes()`` global and the equivalent tag to a
+    Jinja2 environment::
+
+        {{ render_attributes(defaults, instance.attributes, excluded_keys="style") }}
+        {% render_attributes defaults, instance.attributes, excluded_keys="style" %}
+    """
+    tags = {'render_attributes'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.globals['render_attributes'] = render_attributes
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = []
+        kwargs = []
+        while parser.stream.current.type != 'block_end':
+            if args or kwargs:
+                parser.stream.expect('comma')
+            if parser.stream.current.test('name:excluded_keys') and parser.stream.look().test('assign'):
+                parser.stream.skip(2)
+                kwargs.append(nodes.Keyword('excluded_keys', parser.parse_expression(), lineno=lineno))
+            else:
+                args.append(parser.parse_expression())
+        call = self.call_method('_render', [nodes.ContextReference(), *args], kwargs, lineno=lineno)
+        return nodes.Output([call], lineno=lineno)
+
+    def _render(self, context, *values, excluded_keys=()):
+        return render_attributes(context, *values, excluded_keys=excluded_keys)
@@ -0,0 +1,98 @@
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+
+class ExceededAttributes(dict):
+    """
+    The pairs submitted to an `AttributesWidget` that exceed its limits, so
+    the form can be displayed again with all of them (up to `max_items`, as
+    they were not checked). Pairs with an empty key are skipped. The form
+    field raises the `error` when cleaning the value.
+    """
+    __slots__ = ('error',)
+
+    max_items = 1000
+
+    def __init__(self, items, error):
+        super().__init__(islice((item for item in items if item[0] != ''), self.max_items))
+        self.error = error
+
+
+class AttributesLimits:
+    """
+    Size limits of submitted attributes: the number of keys, the length of
+    each key and value and the total payload in bytes (UTF-8 encoded keys and
+    values). Limits set to ``None`` are not enforced.
+
+    `check` and `iter_items` stop at the first violation, so oversized
+    submissions are rejected without validating or serializing every item.
+    """
+    __slots__ = ('max_keys', 'max_key_length', 'max_value_length', 'max_bytes')
+
+    def __init__(self, max_keys=None, max_key_length=None, max_value_length=None, max_bytes=None):
+        self.max_keys = max_keys
+        self.max_key_length = max_key_length
+        self.max_value_length = max_value_length
+        self.max_bytes = max_bytes
+
+    def __bool__(self):
+        return any(getattr(self, name) is not None for name in self.__slots__)
+
+    def __deepcopy__(self, memo):
+        # Immutable, so form field and widget copies can share it.
+        return self
+
+    def check(self, items):
+        """
+        Raises a `ValidationError` for the first of the `(key, value)` pairs
+        in `items` that exceeds a limit. Pairs with an empty key, e.g. the
+        empty rows of the widget, are skipped.
+        """
+        for _item in self.iter_items(items):
+            pass
+
+    def iter_items(self, items):
+        """
+        Yields the `(key, value)` pairs in `items` that have a key, as `check`
+        raises a `ValidationError` for the first one exceeding a limit.
+        """
+        max_keys = self.max_keys
+        max_key_length = self.max_key_length
+        max_value_length = self.max_value_length
+        max_bytes = self.max_bytes
+        count = 0
+        size = 0
+        for key, value in items:
+            if key == '':
+                continue
+            count += 1
+            if max_keys is not None and count > max_keys:
+                raise ValidationError(
+                    _('Ensure there are at most {max_keys} attributes.').format(max_keys=max_keys),
+                    code='max_keys',
+                )
+            if max_key_length is not None and len(key) > max_key_length:
+                raise ValidationError(
+                    _('Ensure keys have at most {max_key_length} characters '
+                      '(a key has {length}).').format(max_key_length=max_key_length, length=len(key)),
+                    code='max_key_length',
+                )
+            text = value if isinstance(value, str) else str(value)
+            if max_value_length is not None and len(text) > max_value_length:
+                raise ValidationError(
+                    _('Ensure the value for the key "{key}" has at most {max_value_length} characters '
+                      '(it has {length}).').format(key=key, max_value_length=max_value_length, length=len(text)),
+                    code='max_value_length',
+                )
+            if max_bytes is not None:
+                size += len(key.encode()) + len(text.encode())
+                if size > max_bytes:
+                    raise ValidationError(
+                        _('Ensure the attributes have at most {max_bytes} bytes in total.').format(
+                            max_bytes=max_bytes,
+                        ),
+                        code='max_bytes',
+                    )
+            yield key, value
@@ -0,0 +1,47 @@
+from django.db import models
+from django.db.models.fields.json import (
+    HasAnyKeys,
+    HasKey,
+    HasKeys,
+    KeyTransform,
+)
+from django.db.models.functions import Cast, NullIf
+
+
+def as_json(expression):
+    """
+    Returns `expression`, an `AttributesField` column, as a JSON expression
+    that Django's JSON lookups and transforms can operate on. Text columns
+    are cast to JSON (``jsonb`` on PostgreSQL), treating empty strings as
+    ``NULL`` since they are not valid JSON.
+    """
+    if not getattr(expression.output_field, 'native_json', False):
+        expression = NullIf(expression, models.Value(''))
+    return Cast(expression, models.JSONField())
+
+
+class AttributesKeyTransformFactory:
+    """
+    Creates the transform for ``attributes__<key>``. Nested keys and the
+    lookups on the resulting value are those of `models.JSONField`.
+    """
+    def __init__(self, key_name):
+        self.key_name = key_name
+
+    def __call__(self, lhs, **kwargs):
+        return KeyTransform(self.key_name, as_json(lhs), **kwargs)
+
+
+class AttributesHasKey(HasKey):
+    def __init__(self, lhs, rhs):
+        super().__init__(as_json(lhs), rhs)
+
+
+class AttributesHasKeys(HasKeys):
+    def __init__(self, lhs, rhs):
+        super().__init__(as_json(lhs), rhs)
+
+
+class AttributesHasAnyKeys(HasAnyKeys):
+    def __init__(self, lhs, rhs):
+        super().__init__(as_json(lhs), rhs)
@@ -0,0 +1,106 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from djangocms_attributes_field.fields import AttributesField
+
+
+class AttributesFieldCommand(BaseCommand):
+    """
+    Base for commands rewriting the stored attributes of every model with an
+    `AttributesField` (or only the given ones). Rows are streamed in chunks,
+    changed rows are written back with `bulk_update`.
+
+    Subclasses implement `process(obj, fields)`, which updates `obj` in place
+    and returns whether it was changed. The «name»_rendered columns of fields
+    with `store_rendered=True` are updated along with the attributes.
+    """
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restricts the command to the given apps or models.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Reports the changes without writing them.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows fetched and updated at once (default: 1000).',
+        )
+
+    def get_models(self, labels):
+        if not labels:
+            return apps.get_models()
+        models = []
+        for label in labels:
+            try:
+                if '.' in label:
+                    models.append(apps.get_model(label))
+                else:
+                    models.extend(apps.get_app_config(label).get_models())
+            except LookupError as exc:
+                raise CommandError(str(exc))
+        return models
+
+    def get_fields(self, model):
+        if model._meta.proxy:
+            return []
+        # Only local fields, inherited ones are processed with their model.
+        return [
+            field for field in model._meta.local_concrete_fields
+            if isinstance(field, AttributesField)
+        ]
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be a positive number.')
+
+        for model in self.get_models(options['labels']):
+            fields = self.get_fields(model)
+            if fields:
+                self.handle_model(model, fields, chunk_size)
+
+    def get_queryset(self, model, fields):
+        return model._base_manager.only(
+            model._meta.pk.attname, *(field.attname for field in fields),
+        ).order_by('pk')
+
+    def handle_model(self, model, fields, chunk_size):
+        label = model._meta.label
+        queryset = self.get_queryset(model, fields)
+        checked = changed = 0
+        batch = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            checked += 1
+            if self.process(obj, fields):
+                changed += 1
+                batch.append(obj)
+                if len(batch) >= chunk_size:
+                    self.write_batch(model, fields, batch)
+                    batch = []
+            if self.verbosity >= 2 and checked % chunk_size == 0:
+                self.stdout.write(f'{label}: {checked} rows checked, {changed} changed')
+        self.write_batch(model, fields, batch)
+        if self.verbosity >= 1:
+            action = 'would be changed' if self.dry_run else 'changed'
+            self.stdout.write(f'{label}: {checked} rows checked, {changed} {action}')
+
+    def get_update_fields(self, fields):
+        names = [field.name for field in fields]
+        names.extend(field.rendered_field.name for field in fields if field.rendered_field is not None)
+        return names
+
+    def write_batch(self, model, fields, batch):
+        if batch and not self.dry_run:
+            # bulk_update() does not call pre_save()
+            for field in fields:
+                if field.rendered_field is not None:
+                    for obj in batch:
+                        setattr(obj, field.rendered_field.attname, field.rendered_field.render(obj))
+            model._base_manager.bulk_update(batch, self.get_update_fields(fields))
+
+    def process(self, obj, fields):
+        raise NotImplementedError('subclasses of AttributesFieldCommand must provide a process() method')
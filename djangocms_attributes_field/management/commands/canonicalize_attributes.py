@@ -0,0 +1,47 @@
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+from djangocms_attributes_field.codec import encode
+from djangocms_attributes_field.datastructures import AttributesDict
+
+from ._base import AttributesFieldCommand
+
+
+class Command(AttributesFieldCommand):
+    help = (
+        'Rewrites the stored attributes of AttributesFields with canonical=True '
+        'that are not stored in their canonical form yet.'
+    )
+
+    def get_fields(self, model):
+        # Native JSON columns are normalized by the database (e.g., jsonb),
+        # their text representation is not under our control.
+        return [
+            field for field in super().get_fields(model)
+            if field.canonical and not field.native_json
+        ]
+
+    def get_queryset(self, model, fields):
+        return super().get_queryset(model, fields).annotate(**{
+            self.stored_name(field): Cast(field.attname, TextField()) for field in fields
+        })
+
+    @staticmethod
+    def stored_name(field):
+        return f'_{field.attname}_stored'
+
+    def process(self, obj, fields):
+        changed = False
+        for field in fields:
+            stored = getattr(obj, self.stored_name(field))
+            if not stored:
+                continue
+            value = getattr(obj, field.attname)
+            canonical = encode(value, canonical=True)
+            if stored != canonical:
+                if isinstance(value, dict):
+                    value = AttributesDict(value)
+                    value.raw = value._canonical_json = canonical
+                setattr(obj, field.attname, value)
+                changed = True
+        return changed
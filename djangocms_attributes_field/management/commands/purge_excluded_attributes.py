@@ -0,0 +1,33 @@
+from collections import Counter
+
+from ._base import AttributesFieldCommand
+
+
+class Command(AttributesFieldCommand):
+    help = (
+        'Removes keys that are excluded by the AttributesField (e.g., because '
+        'they were added to excluded_keys later) from the stored attributes.'
+    )
+
+    def handle(self, *args, **options):
+        self.purged = Counter()
+        super().handle(*args, **options)
+        if self.verbosity >= 1 and self.purged:
+            self.stdout.write('Excluded keys found: {}'.format(', '.join(
+                f'{key} ({count})' for key, count in self.purged.most_common()
+            )))
+
+    def process(self, obj, fields):
+        changed = False
+        for field in fields:
+            value = getattr(obj, field.attname)
+            if not isinstance(value, dict):
+                continue
+            excluded = [key for key in value if key in field.excluded_keys_matcher]
+            if excluded:
+                self.purged.update(excluded)
+                setattr(obj, field.attname, {
+                    key: val for key, val in value.items() if key not in excluded
+                })
+                changed = True
+        return changed
@@ -0,0 +1,36 @@
+from ._base import AttributesFieldCommand
+
+
+class Command(AttributesFieldCommand):
+    help = (
+        'Renders the attributes of AttributesFields with store_rendered=True '
+        'into their [field_name]_rendered column where it is missing or out of '
+        'date, e.g. after excluded_keys changed.'
+    )
+
+    def get_fields(self, model):
+        return [field for field in super().get_fields(model) if field.rendered_field is not None]
+
+    def get_queryset(self, model, fields):
+        return super().get_queryset(model, fields).only(
+            model._meta.pk.attname,
+            *(field.attname for field in fields),
+            *(field.rendered_field.attname for field in fields),
+        )
+
+    def get_update_fields(self, fields):
+        return [field.rendered_field.name for field in fields]
+
+    def process(self, obj, fields):
+        changed = False
+        for field in fields:
+            rendered = field.rendered_field.render(obj)
+            if getattr(obj, field.rendered_field.attname) != rendered:
+                setattr(obj, field.rendered_field.attname, rendered)
+                changed = True
+        return changed
+
+    def write_batch(self, model, fields, batch):
+        # The rendered columns were already set by process()
+        if batch and not self.dry_run:
+            model._base_manager.bulk_update(batch, self.get_update_fields(fields))
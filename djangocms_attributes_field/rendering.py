@@ -0,0 +1,260 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import conditional_escape, mark_safe
+from django.utils.safestring import SafeData
+
+from .codec import encode
+from .datastructures import _JSON_SCALAR_TYPES, AttributesDict, LRUCache
+
+RENDER_CACHE_SIZE_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE'
+SHARED_RENDER_CACHE_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE'
+SHARED_RENDER_CACHE_TIMEOUT_SETTING = 'DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE_TIMEOUT'
+
+# Version of the keys of the shared render cache, to be increased whenever
+# the rendered output changes.
+RENDER_CACHE_VERSION = 1
+
+# The characters replaced by `django.utils.html.escape`
+_ESCAPED_CHARACTERS = re.compile('[&<>"\']')
+
+_render_cache = None
+_shared_render_cache = None
+
+
+class RenderCache(LRUCache):
+    """
+    A small, thread-safe LRU mapping of (JSON, excluded keys) to
+    rendered attribute strings. Shared by all fields of the process so that
+    identical attribute sets are only escaped and joined once.
+    """
+
+
+def get_render_cache():
+    """
+    Returns the process-wide `RenderCache` or ``None`` if it is disabled,
+    which is the case unless ``DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE``
+    is set to a positive number.
+    """
+    global _render_cache
+
+    if _render_cache is None:
+        maxsize = getattr(settings, RENDER_CACHE_SIZE_SETTING, 0)
+        _render_cache = RenderCache(maxsize) if maxsize > 0 else False
+    return _render_cache if _render_cache is not False else None
+
+
+class SharedRenderCache:
+    """
+    Stores rendered attribute strings in a cache of Django's cache framework,
+    so they are shared by all processes using it. Keys are derived from the
+    attributes and the fingerprint of the excluded keys, changing the
+    excluded keys of a field does not hit entries rendered before.
+    """
+    key_prefix = 'djangocms_attributes_field:render'
+
+    def __init__(self, alias, timeout=DEFAULT_TIMEOUT):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(value, excluded_keys):
+        """
+        Raises `ValueError` if a value of `value` is not a JSON scalar, or
+        `TypeError` if the excluded keys cannot be serialized.
+        """
+        # Only the JSON of scalars identifies their output: nested values are
+        # rendered in their order (and e.g. tuples like lists), safe strings
+        # serialize like plain strings but are not escaped.
+        if not all(type(val) in _JSON_SCALAR_TYPES for val in value.values()):
+            raise ValueError('Only values of JSON scalars have a key.')
+        fingerprint = getattr(excluded_keys, 'fingerprint', None)
+        if fingerprint is None:
+            fingerprint = encode(sorted(excluded_keys), canonical=True)
+        # The items in order, the output keeps it.
+        data = encode([fingerprint, list(value.items())], canonical=True)
+        return '{}:{}'.format(SharedRenderCache.key_prefix, hashlib.sha256(data.encode()).hexdigest())
+
+    def get(self, key):
+        rendered = self.cache.get(key, version=RENDER_CACHE_VERSION)
+        if rendered is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return mark_safe(rendered)
+
+    def set(self, key, rendered):
+        self.cache.set(key, str(rendered), self.timeout, version=RENDER_CACHE_VERSION)
+
+
+def get_shared_render_cache():
+    """
+    Returns the `SharedRenderCache` using the cache alias configured with
+    ``DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE`` or ``None`` if it is
+    not set. ``DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE_TIMEOUT``
+    overrides the timeout of the cache.
+    """
+    global _shared_render_cache
+
+    if _shared_render_cache is None:
+        alias = getattr(settings, SHARED_RENDER_CACHE_SETTING, None)
+        _shared_render_cache = SharedRenderCache(
+            alias, getattr(settings, SHARED_RENDER_CACHE_TIMEOUT_SETTING, DEFAULT_TIMEOUT),
+        ) if alias else False
+    return _shared_render_cache if _shared_render_cache is not False else None
+
+
+@receiver(setting_changed)
+def _reset_render_cache(setting, **kwargs):
+    global _render_cache, _shared_render_cache
+
+    if setting == RENDER_CACHE_SIZE_SETTING:
+        _render_cache = None
+    elif setting in (SHARED_RENDER_CACHE_SETTING, SHARED_RENDER_CACHE_TIMEOUT_SETTING, 'CACHES'):
+        _shared_render_cache = None
+
+
+def _render_key(value):
+    """
+    Returns a hashable key identifying the rendered output of `value`, or
+    ``None`` if there is none. Types are part of the key, `1` and `True`
+    compare equal but render differently. Values that are not JSON scalars
+    have no key, e.g. the elements of ``(1,)`` and ``(1.0,)`` compare equal.
+    """
+    if isinstance(value, AttributesDict) and value.raw is not None:
+        return value.raw
+    if isinstance(value, dict):
+        key = tuple((key, val.__class__, val) for key, val in value.items())
+        if not all(item[1] in _JSON_SCALAR_TYPES for item in key):
+            return None
+        return key
+    return None
+
+
+def _render(value, excluded_keys):
+    try:
+        value_items = value.items()
+    except AttributeError:
+        value_items = [value]
+
+    needs_escaping = _ESCAPED_CHARACTERS.search
+    attrs = []
+    for key, val in value_items:
+        if key not in excluded_keys:
+            if val:
+                # Plain strings without any of the escaped characters are
+                # used as they are, everything else (including safe strings
+                # and non-strings) goes through `conditional_escape`.
+                if type(val) is not str or needs_escaping(val):
+                    val = conditional_escape(val)
+                attrs.append(f'{key}="{val}"')
+            else:
+                attrs.append(f'{key}')
+    return mark_safe(" ".join(attrs))
+
+
+def render_attributes(value, excluded_keys=()):
+    """
+    Emits the key/value pairs of `value` as a String suitable for adding to
+    an HTML element, skipping every key contained in `excluded_keys`.
+
+    :param value: (dict) the attributes to render
+    :param excluded_keys: (container) keys to filter, usually an
+                          `ExcludedKeysMatcher`
+    """
+    cache = get_render_cache()
+    shared_cache = get_shared_render_cache()
+    if (cache is None and shared_cache is None) or not isinstance(value, dict):
+        return _render(value, excluded_keys)
+    if any(isinstance(val, SafeData) for val in value.values()):
+        # Safe strings are not escaped, but serialize and compare like plain
+        # strings, so they must never share cache entries with them.
+        return _render(value, excluded_keys)
+
+    key = None
+    try:
+        if cache is not None:
+            # Keys are not sorted, the output keeps the order of the
+            # attributes. A stored document decodes to exactly this dict, so
+            # it can be used as is (values of `canonical` fields share it for
+            # equal attributes). Otherwise the types of the values are part
+            # of the key.
+            key = _render_key(value)
+            if key is not None:
+                key = (key, excluded_keys)
+                rendered = cache.get(key)
+                if rendered is not None:
+                    return rendered
+        if shared_cache is not None:
+            shared_key = shared_cache.make_key(value, excluded_keys)
+    except (TypeError, ValueError):
+        # Not serializable (or the excluded keys are not hashable)
+        return _render(value, excluded_keys)
+
+    if shared_cache is not None:
+        rendered = shared_cache.get(shared_key)
+        if rendered is None:
+            rendered = _render(value, excluded_keys)
+            shared_cache.set(shared_key, rendered)
+    else:
+        rendered = _render(value, excluded_keys)
+    if key is not None:
+        cache.set(key, rendered)
+    return rendered
+
+
+def merge_attributes(*values):
+    """
+    Merges the attribute dicts `values`, later ones taking precedence, except
+    for the classes in ``class`` which are concatenated (each one only once).
+    Values that are not dicts, e.g. ``None``, are skipped.
+    """
+    merged = {}
+    for value in values:
+        if not isinstance(value, dict):
+            continue
+        for key, val in value.items():
+            if key == 'class' and val and merged.get('class'):
+                classes = str(merged['class']).split()
+                classes.extend(name for name in str(val).split() if name not in classes)
+                val = ' '.join(classes)
+            merged[key] = val
+    return merged
+
+
+def render_merged_attributes(values, excluded_keys=(), cache=None):
+    """
+    Renders the merged attribute dicts `values` (see `merge_attributes`).
+    `cache` is a dict that keeps the output of inputs seen before, e.g. while
+    rendering a template.
+    """
+    values = [value for value in values if isinstance(value, dict)]
+    key = None
+    if cache is not None:
+        key = tuple(_render_key(value) for value in values)
+        if None in key:
+            key = None
+        else:
+            key = (excluded_keys, key)
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+            except TypeError:
+                # The excluded keys are not hashable
+                key = None
+
+    if len(values) == 1 and isinstance(values[0], AttributesDict):
+        rendered = values[0].to_html(excluded_keys)
+    else:
+        rendered = render_attributes(merge_attributes(*values), excluded_keys)
+    if key is not None:
+        cache[key] = rendered
+    return rendered
@@ -0,0 +1,22 @@
+from django import template
+
+from ..fields import get_excluded_keys_matcher
+from ..rendering import render_merged_attributes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def render_attributes(context, *values, excluded_keys=()):
+    """
+    Renders one or more attribute dicts, merged from left to right with their
+    classes concatenated, filtering `excluded_keys` (a list or a
+    comma-separated string) and the `default_excluded_keys`::
+
+        {% render_attributes defaults instance.attributes excluded_keys="style" %}
+
+    The output is kept for the rest of the template render, repeated inputs
+    (e.g. in loops) are only rendered once.
+    """
+    cache = context.render_context.setdefault('djangocms_attributes_field', {})
+    return render_merged_attributes(values, get_excluded_keys_matcher(excluded_keys), cache)
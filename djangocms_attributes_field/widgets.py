@@ -1,11 +1,18 @@
 import os
+from contextvars import ContextVar
 
 from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.signals import request_finished, request_started
+from django.dispatch import receiver
 from django.forms import Media, Widget
 from django.forms.utils import flatatt
 from django.utils.html import escape, mark_safe, strip_spaces_between_tags
 from django.utils.translation import gettext as _
 
+from .instrumentation import instrumented
+from .limits import AttributesLimits, ExceededAttributes
+
 # NOTE: Inlining the CSS and JS code allows avoiding to register
 # djangocms_attributes_field in INSTALLED_APPS. It will, however,
 # potentially conflict with a CSP.
@@ -16,6 +23,34 @@ from django.utils.translation import gettext as _
 # djangocms_attributes_field as an app, but still want to use the widget.
 _inline_code = None
 
+# The inline code is only needed once per response: while a request is being
+# handled, this is False until the first widget emitted it. Outside of
+# requests it is None and every widget emits the code.
+_inline_code_emitted = ContextVar('djangocms_attributes_field_inline_code_emitted', default=None)
+
+# Whitespace between the tags is stripped once here, not on every row.
+_ROW_TEMPLATE = strip_spaces_between_tags("""
+        <div class="form-row attributes-pair">
+            <div class="field-box">
+               <input type="text" class="attributes-key" name="attributes_key[{field_name}]" value="{key}" {key_attrs}>
+            </div>
+            <div class="field-box">
+               <input type="text" class="attributes-value"
+                      name="attributes_value[{field_name}]"
+                      value="{value}" {val_attrs}>
+                <a class="delete-attributes-pair deletelink" href="#" title="{remove}"></a>
+            </div>
+        </div>
+        """.strip())
+
+_FOOTER_TEMPLATE = """
+        <div class="template hidden">{template}
+        </div>
+        <div class="related-widget-wrapper">
+            <a class="add-attributes-pair addlink" href="#" title="{title}"></a>
+        </div>
+        </div>{inline_code}"""
+
 def _read_inline_code():
     if apps.is_installed('djangocms_attributes_field'):
         _inline_code = ""
@@ -32,6 +67,38 @@ def _read_inline_code():
     return _inline_code
 
 
+def _get_inline_code():
+    global _inline_code
+
+    if _inline_code is None:
+        _inline_code = _read_inline_code()
+    return _inline_code
+
+
+def _consume_inline_code():
+    """
+    Returns the inline code unless it was already emitted for this request.
+    """
+    inline_code = _get_inline_code()
+    if inline_code:
+        emitted = _inline_code_emitted.get()
+        if emitted:
+            return ''
+        if emitted is not None:
+            _inline_code_emitted.set(True)
+    return inline_code
+
+
+@receiver(request_started)
+def _start_inline_code_scope(**kwargs):
+    _inline_code_emitted.set(False)
+
+
+@receiver(request_finished)
+def _end_inline_code_scope(**kwargs):
+    _inline_code_emitted.set(None)
+
+
 class AttributesWidget(Widget):
     """
     A widget that displays key/value pairs from JSON as a list of text input
@@ -41,11 +108,13 @@ class AttributesWidget(Widget):
     # https://www.huyng.com/posts/django-custom-form-widget-for-dictionary-and-tuple-key-value-pairs
     def __init__(self, *args, **kwargs):
         """
-        Supports additional kwargs: `key_attr`, `val_attr`, `sorted`.
+        Supports additional kwargs: `key_attr`, `val_attr`, `sorted`,
+        `limits`.
         """
         self.key_attrs = kwargs.pop('key_attrs', {})
         self.val_attrs = kwargs.pop('val_attrs', {})
         self.sorted = sorted if kwargs.pop('sorted', True) else lambda x: x
+        self.limits = kwargs.pop('limits', None) or AttributesLimits()
         super().__init__(*args, **kwargs)
 
     @property
@@ -56,12 +125,7 @@ class AttributesWidget(Widget):
         of the widget, otherwise it will inline the CSS and JS.
         """
 
-        global _inline_code
-
-        if _inline_code is None:
-            _inline_code = _read_inline_code()
-
-        if _inline_code:
+        if _get_inline_code():
             return Media()
         else:
             return Media(
@@ -73,39 +137,27 @@ class AttributesWidget(Widget):
                 )
             )
 
-    def _render_row(self, key, value, field_name, key_attrs, val_attrs):
+    def _render_row(self, key, value, field_name, key_attrs, val_attrs, remove=None):
         """
         Renders to HTML a single key/value pair row.
 
         :param key: (str) key
         :param value: (str) value
         :param field_name: (str) String name of this field
-        :param key_attrs: (dict) HTML attributes to be applied to the key input
-        :param val_attrs: (dict) HTML attributes to be applied to the value input
+        :param key_attrs: (str) flattened HTML attributes of the key input
+        :param val_attrs: (str) flattened HTML attributes of the value input
+        :param remove: (str) title of the remove link, translated if omitted
         """
-        template = """
-        <div class="form-row attributes-pair">
-            <div class="field-box">
-               <input type="text" class="attributes-key" name="attributes_key[{field_name}]" value="{key}" {key_attrs}>
-            </div>
-            <div class="field-box">
-               <input type="text" class="attributes-value"
-                      name="attributes_value[{field_name}]"
-                      value="{value}" {val_attrs}>
-                <a class="delete-attributes-pair deletelink" href="#" title="{remove}"></a>
-            </div>
-        </div>
-        """.format(
+        return _ROW_TEMPLATE.format(
             key=escape(key),
             value=escape(value),
             field_name=field_name,
             key_attrs=key_attrs,
             val_attrs=val_attrs,
-            remove=_('Remove'),
+            remove=_('Remove') if remove is None else remove,
         )
 
-        return strip_spaces_between_tags(template.strip())
-
+    @instrumented('widget_render')
     def render(self, name, value, attrs=None, renderer=None):
         """
         Renders this field into an HTML string.
@@ -115,38 +167,35 @@ class AttributesWidget(Widget):
         :param attrs: (dict) automatically passed in by django (unused by this function)
         :param renderer: (object) automatically passed in by django (unused by this function)
         """
-        if not value:
-            value = '{}'
-
-        if attrs is None:
-            attrs = {}
-
-        output = '<div class="djangocms-attributes-field">'
-        if value and isinstance(value, dict) and len(value) > 0:
+        # Flattened once per call rather than per row. Not cached on the
+        # instance as `key_attrs` and `val_attrs` may change after __init__.
+        key_attrs = flatatt(self.key_attrs)
+        val_attrs = flatatt(self.val_attrs)
+        remove = _('Remove')
+
+        output = ['<div class="djangocms-attributes-field">']
+        if value and isinstance(value, dict):
             for key in self.sorted(value):
-                output += self._render_row(key, value[key], name, flatatt(self.key_attrs), flatatt(self.val_attrs))
+                output.append(self._render_row(key, value[key], name, key_attrs, val_attrs, remove))
 
-        # Add empty template
-        output += """
-        <div class="template hidden">{}
-        </div>""".format(self._render_row('', '', name, flatatt(self.key_attrs), flatatt(self.val_attrs)))
-
-        # Add "+" button
-        output += """
-        <div class="related-widget-wrapper">
-            <a class="add-attributes-pair addlink" href="#" title="{title}"></a>
-        </div>
-        """.format(
+        # Add empty template and "+" button
+        output.append(_FOOTER_TEMPLATE.format(
+            template=self._render_row('', '', name, key_attrs, val_attrs, remove),
             title=_('Add another key/value pair'),
-        )
-        output += f'</div>{_inline_code}'
-        return mark_safe(output)
+            inline_code=_consume_inline_code(),
+        ))
+        return mark_safe(''.join(output))
 
     def value_from_datadict(self, data, files, name):
         """
         Returns the dict-representation of the key-value pairs
         sent in the POST parameters
 
+        If the pairs exceed the `limits` of the widget, checking them stops at
+        the first violation and they are returned as `ExceededAttributes`,
+        which carries the `ValidationError`. The form field raises it when
+        cleaning the value.
+
         :param data: (dict) request.POST or request.GET parameters.
         :param files: (list) request.FILES
         :param name: (str) the name of the field associated with this widget.
@@ -156,6 +205,14 @@ class AttributesWidget(Widget):
         if key_field in data and val_field in data:
             keys = data.getlist(key_field)
             values = data.getlist(val_field)
+            if self.limits:
+                value = {}
+                try:
+                    for key, val in self.limits.iter_items(zip(keys, values)):
+                        value[key] = val
+                except ValidationError as error:
+                    return ExceededAttributes(zip(keys, values), error)
+                return value
             return dict([item for item in zip(keys, values) if not item[0] == ''])
         return {}
 
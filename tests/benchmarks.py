@@ -0,0 +1,343 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the hot paths of djangocms-attributes-field.
+
+Run them from the repository root with::
+
+    python tests/benchmarks.py [--quick] [--json FILE] [--compare FILE] [name ...]
+
+They run offline against a throwaway SQLite database, using attribute sets of
+0 to 50 keys with short and long values generated from a fixed seed.
+``--json`` writes the results in a machine-readable format, ``--compare``
+reports the change relative to such a file, e.g. one written on another
+branch.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+import timeit
+
+BENCHMARKS = {}
+
+# Number of keys and length of the values of the generated attribute sets
+SIZES = (0, 1, 5, 10, 25, 50)
+VALUE_LENGTHS = {'short': 8, 'long': 200}
+BULK_ROWS = 10000
+
+
+def benchmark(number, database=False):
+    """
+    Registers a benchmark. The decorated function returns a list of
+    ``(variant, params, callable)``, each callable is timed `number` times.
+    """
+    def decorator(func):
+        func.number = number
+        func.database = database
+        BENCHMARKS[func.__name__] = func
+        return func
+    return decorator
+
+
+def make_attributes(size, length, seed=0):
+    rng = random.Random(f'{size}-{length}-{seed}')
+    alphabet = string.ascii_letters + string.digits + ' -_<>&"'
+    return {
+        f'data-key{i}': ''.join(rng.choice(alphabet) for _ in range(length))
+        for i in range(size)
+    }
+
+
+def attribute_sets():
+    for size in SIZES:
+        for label, length in VALUE_LENGTHS.items():
+            if size or label == 'short':
+                yield {'keys': size, 'values': label}, make_attributes(size, length)
+
+
+@benchmark(number=2000)
+def from_db_value():
+    """
+    Decoding a stored value, eagerly, with `lazy=True` and with `intern=True`.
+    """
+    from djangocms_attributes_field.fields import AttributesField
+
+    fields = {
+        'eager': AttributesField(),
+        'lazy': AttributesField(lazy=True),
+        'intern': AttributesField(intern=True),
+    }
+    cases = []
+    for params, attributes in attribute_sets():
+        raw = json.dumps(attributes)
+        for variant, field in fields.items():
+            cases.append((variant, params, lambda field=field, raw=raw: field.from_db_value(raw)))
+    return cases
+
+
+@benchmark(number=2000)
+def get_prep_value():
+    """
+    Serializing a dict vs. an unmodified value loaded from the database.
+    """
+    from djangocms_attributes_field.fields import AttributesField
+
+    field = AttributesField()
+    cases = []
+    for params, attributes in attribute_sets():
+        loaded = field.from_db_value(json.dumps(attributes))
+        cases.append(('dict', params, lambda value=attributes: field.get_prep_value(value)))
+        cases.append(('loaded', params, lambda value=loaded: field.get_prep_value(value)))
+    return cases
+
+
+@benchmark(number=2000)
+def to_str():
+    """
+    Rendering «name»_str, bypassing the per-instance cache, vs. reading it
+    from the column of `store_rendered=True`.
+    """
+    from tests.test_app.models import RenderedModel, TestPlugin
+
+    def render(obj):
+        obj.__dict__.pop('_attributes1_str_cache', None)
+        return obj.attributes1_str
+
+    field = RenderedModel._meta.get_field('attributes')
+    cases = []
+    for params, attributes in attribute_sets():
+        stored = RenderedModel(
+            attributes=field.from_db_value(json.dumps(attributes)),
+            attributes_rendered=str(field.render_value(RenderedModel(attributes=attributes))),
+        )
+        cases.append(('uncached', params, lambda obj=TestPlugin(attributes1=attributes): render(obj)))
+        cases.append(('stored', params, lambda obj=stored: obj.attributes_str))
+    return cases
+
+
+@benchmark(number=100000)
+def str_accessor():
+    """
+    «name»_str through the model descriptor vs. the `to_str` classmethod,
+    both served from the per-instance cache, so the difference is the cost
+    of the field lookup.
+    """
+    from djangocms_attributes_field.fields import AttributesField
+    from tests.test_app.models import TestPlugin
+
+    instance = TestPlugin(attributes1={'class': 'btn btn-primary', 'target': '_blank'})
+    return [
+        ('to_str', {}, lambda: AttributesField.to_str(instance, 'attributes1')),
+        ('descriptor', {}, lambda: instance.attributes1_str),
+    ]
+
+
+@benchmark(number=1000)
+def to_str_many():
+    """
+    Rendering 500 instances sharing 10 attribute sets one by one vs. in a
+    batch (per-instance caches are cleared before each run).
+    """
+    from djangocms_attributes_field.fields import AttributesField
+    from tests.test_app.models import TestPlugin
+
+    objs = [
+        TestPlugin(attributes1={'class': f'btn btn-{i % 10}', 'target': '_blank', 'title': 'Read more'})
+        for i in range(500)
+    ]
+
+    def one_by_one():
+        for obj in objs:
+            obj.__dict__.pop('_attributes1_str_cache', None)
+        return [obj.attributes1_str for obj in objs]
+
+    def batch():
+        for obj in objs:
+            obj.__dict__.pop('_attributes1_str_cache', None)
+        return AttributesField.to_str_many(objs, 'attributes1')
+
+    return [('one_by_one', {}, one_by_one), ('to_str_many', {}, batch)]
+
+
+@benchmark(number=1000)
+def form_field():
+    """
+    Validating and cleaning the submitted attributes in the form field.
+    """
+    from djangocms_attributes_field.fields import AttributesFormField
+
+    field = AttributesFormField(excluded_keys=['style'])
+    cases = []
+    for params, attributes in attribute_sets():
+        cases.append(('validate', params, lambda value=attributes: field.validate(value)))
+        cases.append(('clean', params, lambda value=attributes: field.clean(value)))
+    return cases
+
+
+@benchmark(number=500)
+def widget_render():
+    """
+    Rendering the admin widget.
+    """
+    from djangocms_attributes_field.widgets import AttributesWidget
+
+    widget = AttributesWidget(key_attrs={'style': 'width:250px'}, val_attrs={'style': 'width:500px'})
+    return [
+        ('render', params, lambda value=attributes: widget.render('attributes', value))
+        for params, attributes in attribute_sets()
+    ]
+
+
+@benchmark(number=1, database=True)
+def bulk_load():
+    """
+    Loading 10k TestPlugin rows with attribute sets of all sizes.
+    """
+    from cms.models import CMSPlugin, Placeholder
+    from django.db import connection
+
+    from tests.test_app.models import TestPlugin
+
+    sets = [attributes for _, attributes in attribute_sets()]
+    placeholder = Placeholder.objects.create(slot='benchmark')
+    parents = []
+    for position in range(BULK_ROWS):
+        parent = CMSPlugin(
+            placeholder=placeholder, language='en', plugin_type='TestPluginPlugin', position=position,
+        )
+        if hasattr(CMSPlugin, '_get_path'):
+            # django CMS < 4 keeps the plugin tree in django-treebeard fields
+            parent.path, parent.depth = CMSPlugin._get_path(None, 1, position + 1), 1
+        parents.append(parent)
+    CMSPlugin.objects.bulk_create(parents, batch_size=500)
+    pks = CMSPlugin.objects.filter(placeholder=placeholder).order_by('position').values_list('pk', flat=True)
+
+    opts = TestPlugin._meta
+    field = opts.get_field('attributes1')
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {opts.db_table} ({opts.pk.column}, label, attributes1, attributes2) '
+            'VALUES (%s, %s, %s, %s)',
+            [
+                (pk, 'label', field.get_prep_value(sets[i % len(sets)]), field.get_prep_value({}))
+                for i, pk in enumerate(pks)
+            ],
+        )
+
+    params = {'rows': BULK_ROWS}
+    return [
+        ('instances', params, lambda: list(TestPlugin.objects.all())),
+        ('values_list', params, lambda: list(TestPlugin.objects.values_list('attributes1', flat=True))),
+        ('to_str', params, lambda: [obj.attributes1_str for obj in TestPlugin.objects.all()]),
+    ]
+
+
+def setup(codec=None):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app_helper import runner
+
+    from tests import settings
+    runner.setup('djangocms_attributes_field', settings, use_cms=True)
+    if codec:
+        from django.conf import settings
+
+        settings.DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC = codec
+
+
+def run(names, repeat=5, scale=1):
+    results = []
+    for name in names:
+        func = BENCHMARKS[name]
+        number = max(1, int(func.number * scale))
+        print(f"{name}: {' '.join(func.__doc__.split())}")
+        for variant, params, case in func():
+            timings = [total / number for total in timeit.repeat(case, number=number, repeat=repeat)]
+            label = ' '.join(f'{key}={value}' for key, value in params.items())
+            print(f'    {variant:<12} {label:<20} {min(timings) * 1e6:12.3f} µs/call')
+            results.append({
+                'benchmark': name,
+                'variant': variant,
+                'params': params,
+                'number': number,
+                'repeat': repeat,
+                'best': min(timings),
+                'mean': sum(timings) / repeat,
+            })
+    return results
+
+
+def metadata():
+    import cms
+    from django.conf import settings
+
+    from djangocms_attributes_field import __version__
+    from djangocms_attributes_field.codec import get_codec
+    from djangocms_attributes_field.rendering import RENDER_CACHE_SIZE_SETTING
+    from djangocms_attributes_field.utils import DJANGO_VERSION, PYTHON_VERSION
+
+    return {
+        'version': __version__,
+        'python': PYTHON_VERSION,
+        'django': DJANGO_VERSION,
+        'cms': cms.__version__,
+        'codec': type(get_codec()).__name__,
+        'render_cache_size': getattr(settings, RENDER_CACHE_SIZE_SETTING, 0),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(results, baseline):
+    def key(result):
+        return result['benchmark'], result['variant'], json.dumps(result['params'], sort_keys=True)
+
+    previous = {key(result): result for result in baseline['results']}
+    print(f"\nChange relative to {baseline['metadata']['version']} ({baseline['metadata']['time']}):")
+    for result in results:
+        before = previous.get(key(result))
+        if before:
+            label = ' '.join(f'{k}={v}' for k, v in result['params'].items())
+            change = (result['best'] / before['best'] - 1) * 100
+            print(f"    {result['benchmark']:<16} {result['variant']:<12} {label:<20} {change:+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for djangocms-attributes-field.')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--quick', action='store_true', help='run a tenth of the iterations')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timings per case (default: 5)')
+    parser.add_argument('--codec', help='dotted path of the JSON codec to use')
+    parser.add_argument('--json', metavar='FILE', help='write the results to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results with FILE')
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    setup(args.codec)
+    names = args.names or list(BENCHMARKS)
+    database = any(BENCHMARKS[name].database for name in names)
+    if database:
+        from django.db import connection
+
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        results = run(names, repeat=args.repeat, scale=0.1 if args.quick else 1)
+    finally:
+        if database:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'metadata': metadata(), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+import djangocms_attributes_field.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NativeJSONModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attributes', djangocms_attributes_field.fields.AttributesField(default=dict, native_json=True)),
+            ],
+        ),
+    ]
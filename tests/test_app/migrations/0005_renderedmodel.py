@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+import djangocms_attributes_field.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0004_canonicalmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderedModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attributes', djangocms_attributes_field.fields.AttributesField(default=dict, store_rendered=True)),
+                ('attributes_rendered', djangocms_attributes_field.fields.RenderedAttributesField(editable=False, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+import djangocms_attributes_field.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('test_app', '0005_renderedmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NullableRenderedModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attributes', djangocms_attributes_field.fields.AttributesField(blank=True, null=True, store_rendered=True)),
+                ('attributes_rendered', djangocms_attributes_field.fields.RenderedAttributesField(editable=False, null=True)),
+            ],
+        ),
+    ]
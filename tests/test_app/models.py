@@ -9,7 +9,28 @@ class TestPlugin(CMSPlugin):
         verbose_name="Test app label",
         max_length=255,
     )
-    attributes1 = AttributesField()
+    attributes1 = AttributesField(track_changes=True)
     attributes2 = AttributesField(
         excluded_keys=["style", "src"],
+        track_changes=True,
     )
+
+
+class NativeJSONModel(models.Model):
+    attributes = AttributesField(native_json=True, excluded_keys=["style"])
+
+
+class LazyModel(models.Model):
+    attributes = AttributesField(lazy=True, track_changes=True)
+
+
+class CanonicalModel(models.Model):
+    attributes = AttributesField(canonical=True)
+
+
+class RenderedModel(models.Model):
+    attributes = AttributesField(store_rendered=True, excluded_keys=['style'], track_changes=True)
+
+
+class NullableRenderedModel(models.Model):
+    attributes = AttributesField(store_rendered=True, null=True, blank=True)
@@ -0,0 +1,119 @@
+import json
+from unittest import skipUnless
+
+from django.test import override_settings
+from django.test.testcases import TestCase
+from django.utils.safestring import mark_safe
+
+from djangocms_attributes_field.codec import (
+    JSONCodec,
+    ORJSONCodec,
+    encode,
+    get_codec,
+)
+from djangocms_attributes_field.datastructures import (
+    AttributesDict,
+    LazyAttributesDict,
+)
+from djangocms_attributes_field.interning import intern_attributes
+
+from . import test_datastructures, test_fields
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_CODEC = 'djangocms_attributes_field.codec.ORJSONCodec'
+
+
+class PlainCodec:
+    # A codec without dumps_canonical
+    loads = staticmethod(json.loads)
+    dumps = staticmethod(json.dumps)
+
+
+class CodecTestCase(TestCase):
+
+    @property
+    def values(self):
+        # Created for each test, lazy values are decoded when compared
+        return [
+            {},
+            {'class': 'btn btn-primary', 'target': '_blank'},
+            {'title': 'Grüße <"&\'>', 'data-count': 3, 'data-ratio': 0.5, 'hidden': True, 'x': None},
+            {'data-list': [1, 'two', {'three': 3}]},
+            {'title': mark_safe('<b>'), 'data-attributes': AttributesDict({'a': 1})},
+            LazyAttributesDict('{"class": "btn", "data-list": [1, 2]}'),
+            intern_attributes('{"title": "x", "hidden": true}'),
+        ]
+
+    def test_default_codec(self):
+        codec = get_codec()
+        self.assertIsInstance(codec, JSONCodec)
+        for value in self.values:
+            self.assertEqual(codec.dumps(value), json.dumps(value))
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC='missing.module.Codec')
+    def test_fallback(self):
+        with self.assertWarns(RuntimeWarning):
+            self.assertIsInstance(get_codec(), JSONCodec)
+
+    @skipUnless(orjson, 'orjson is not installed')
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+    def test_orjson_codec(self):
+        codec = get_codec()
+        self.assertIsInstance(codec, ORJSONCodec)
+        for value in self.values:
+            self.assertEqual(codec.loads(codec.dumps(value)), value)
+            self.assertEqual(codec.loads(json.dumps(value)), value)
+            self.assertEqual(json.loads(codec.dumps(value)), value)
+        with self.assertRaises(TypeError):
+            codec.dumps({'key': object()})
+        with self.assertRaises(ValueError):
+            codec.loads('no json')
+
+    def test_canonical(self):
+        value = {'title': 'Grüße', 'class': 'btn', 'data-list': [{'b': 1, 'a': 2}]}
+        expected = '{"class":"btn","data-list":[{"a":2,"b":1}],"title":"Grüße"}'
+        self.assertEqual(encode(value, canonical=True), expected)
+        self.assertEqual(encode(dict(reversed(value.items())), canonical=True), expected)
+        self.assertEqual(encode(value), json.dumps(value))
+        with override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC='tests.test_codec.PlainCodec'):
+            self.assertEqual(encode(value, canonical=True), expected)
+        if orjson:
+            with override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC):
+                for value in self.values:
+                    self.assertEqual(encode(value, canonical=True), JSONCodec.dumps_canonical(value))
+
+
+# Conformance: the field tests run against every available codec
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+class ORJSONKeyValidationTests(test_fields.KeyValidationTests):
+    pass
+
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+class ORJSONAttributesFieldsTestCase(test_fields.AttributesFieldsTestCase):
+    pass
+
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+class ORJSONNativeJSONTestCase(test_fields.NativeJSONTestCase):
+    pass
+
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+class ORJSONLazyTestCase(test_fields.LazyTestCase):
+    pass
+
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(DJANGOCMS_ATTRIBUTES_FIELD_JSON_CODEC=ORJSON_CODEC)
+class ORJSONLazyAttributesDictTestCase(test_datastructures.LazyAttributesDictTestCase):
+    pass
@@ -0,0 +1,147 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db.models import TextField, Value
+from django.db.models.functions import Cast
+from django.test import TestCase
+
+from djangocms_attributes_field.fields import ExcludedKeysMatcher
+
+from .test_app.models import (
+    CanonicalModel,
+    LazyModel,
+    NativeJSONModel,
+    NullableRenderedModel,
+    RenderedModel,
+)
+
+
+class PurgeExcludedAttributesTestCase(TestCase):
+
+    def setUp(self):
+        # Created without validation, as if the keys were excluded later
+        self.lazy = [
+            LazyModel.objects.create(attributes={'class': 'btn', 'onClick': 'x', 'href': '#'}),
+            LazyModel.objects.create(attributes={'class': 'btn'}),
+            LazyModel.objects.create(attributes={'onload': 'x'}),
+        ]
+        self.native = NativeJSONModel.objects.create(attributes={'style': 'x', 'title': 'y'})
+
+    def call(self, *args, **options):
+        out = StringIO()
+        call_command('purge_excluded_attributes', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_purge(self):
+        out = self.call('test_app', chunk_size=2)
+        self.assertIn('test_app.LazyModel: 3 rows checked, 2 changed', out)
+        self.assertIn('test_app.NativeJSONModel: 1 rows checked, 1 changed', out)
+        self.assertIn('Excluded keys found: ', out)
+        self.assertIn('onClick (1)', out)
+        self.assertEqual(
+            [obj.attributes for obj in LazyModel.objects.order_by('pk')],
+            [{'class': 'btn'}, {'class': 'btn'}, {}],
+        )
+        self.assertEqual(NativeJSONModel.objects.get().attributes, {'title': 'y'})
+
+        out = self.call('test_app')
+        self.assertIn('test_app.LazyModel: 3 rows checked, 0 changed', out)
+        self.assertNotIn('Excluded keys found', out)
+
+    def test_dry_run(self):
+        out = self.call('test_app.LazyModel', dry_run=True, verbosity=2, chunk_size=1)
+        self.assertIn('test_app.LazyModel: 2 rows checked, 1 changed', out)
+        self.assertIn('test_app.LazyModel: 3 rows checked, 2 would be changed', out)
+        self.assertNotIn('NativeJSONModel', out)
+        self.assertEqual(LazyModel.objects.get(pk=self.lazy[2].pk).attributes, {'onload': 'x'})
+
+    def test_errors(self):
+        with self.assertRaises(CommandError):
+            self.call('test_app.Unknown')
+        with self.assertRaises(CommandError):
+            self.call(chunk_size=0)
+
+
+class CanonicalizeAttributesTestCase(TestCase):
+
+    def stored(self):
+        return list(
+            CanonicalModel.objects.order_by('pk').values_list(Cast('attributes', TextField()), flat=True)
+        )
+
+    def test_canonicalize(self):
+        for value in ['{"title": "x", "class": "btn"}', '{"class":"btn"}', '["a", "b"]']:
+            obj = CanonicalModel.objects.create(attributes={})
+            CanonicalModel.objects.filter(pk=obj.pk).update(attributes=Value(value))
+        LazyModel.objects.create(attributes={'title': 'x', 'class': 'btn'})
+
+        out = StringIO()
+        call_command('canonicalize_attributes', dry_run=True, stdout=out)
+        self.assertEqual(out.getvalue(), 'test_app.CanonicalModel: 3 rows checked, 2 would be changed\n')
+
+        call_command('canonicalize_attributes', 'test_app', stdout=out)
+        self.assertEqual(self.stored(), ['{"class":"btn","title":"x"}', '{"class":"btn"}', '["a","b"]'])
+        self.assertEqual(LazyModel.objects.values_list(Cast('attributes', TextField()), flat=True).get(),
+                         '{"title": "x", "class": "btn"}')
+
+
+class UpdateRenderedAttributesTestCase(TestCase):
+
+    def call(self, *args, **options):
+        out = StringIO()
+        call_command('update_rendered_attributes', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def rendered(self, model=RenderedModel):
+        # The rendered attributes without the digest
+        return [
+            stored if stored is None else stored.split(':', 1)[1]
+            for stored in model.objects.order_by('pk').values_list('attributes_rendered', flat=True)
+        ]
+
+    def test_update_rendered(self):
+        objs = [
+            RenderedModel.objects.create(attributes={'class': 'btn', 'title': 'x'}),
+            RenderedModel.objects.create(attributes={'title': '"'}),
+            RenderedModel.objects.create(attributes={}),
+        ]
+        RenderedModel.objects.filter(pk=objs[0].pk).update(attributes_rendered=None)
+        RenderedModel.objects.filter(pk=objs[1].pk).update(attributes_rendered='title="x"')
+
+        self.assertEqual(self.call(dry_run=True), (
+            'test_app.RenderedModel: 3 rows checked, 2 would be changed\n'
+            'test_app.NullableRenderedModel: 0 rows checked, 0 would be changed\n'
+        ))
+        self.assertEqual(
+            RenderedModel.objects.order_by('pk').values_list('attributes_rendered', flat=True)[1], 'title="x"',
+        )
+        self.assertEqual(self.call('test_app.RenderedModel'), 'test_app.RenderedModel: 3 rows checked, 2 changed\n')
+        self.assertEqual(self.rendered(), ['class="btn" title="x"', 'title="&quot;"', ''])
+
+        # After excluded_keys changed
+        field = RenderedModel._meta.get_field('attributes')
+        with mock.patch.object(field, 'excluded_keys_matcher', ExcludedKeysMatcher(['title'])):
+            self.assertEqual(
+                self.call('test_app.RenderedModel'), 'test_app.RenderedModel: 3 rows checked, 3 changed\n',
+            )
+            self.assertEqual(self.rendered(), ['class="btn"', '', ''])
+            self.assertEqual(
+                self.call('test_app.RenderedModel'), 'test_app.RenderedModel: 3 rows checked, 0 changed\n',
+            )
+
+    def test_update_rendered_null(self):
+        NullableRenderedModel.objects.create(attributes=None)
+        obj = NullableRenderedModel.objects.create(attributes={'class': 'btn'})
+        NullableRenderedModel.objects.filter(pk=obj.pk).update(attributes_rendered=None)
+        self.assertEqual(
+            self.call('test_app.NullableRenderedModel'), 'test_app.NullableRenderedModel: 2 rows checked, 1 changed\n',
+        )
+        self.assertEqual(self.rendered(NullableRenderedModel), [None, 'class="btn"'])
+
+    def test_purge_updates_rendered(self):
+        obj = RenderedModel.objects.create(attributes={'class': 'btn'})
+        RenderedModel.objects.filter(pk=obj.pk).update(attributes=Value('{"class": "btn", "onclick": "x"}'))
+        call_command('purge_excluded_attributes', 'test_app.RenderedModel', stdout=StringIO())
+        self.assertEqual(self.rendered(), ['class="btn"'])
+        self.assertEqual(RenderedModel.objects.get().attributes, {'class': 'btn'})
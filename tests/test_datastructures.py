@@ -0,0 +1,247 @@
+import copy
+import json
+import pickle
+from unittest import mock
+
+from django.test import override_settings
+from django.test.testcases import TestCase
+
+from djangocms_attributes_field.datastructures import (
+    AttributesDict,
+    FrozenAttributesDict,
+    LazyAttributesDict,
+    SharedAttributesDict,
+)
+from djangocms_attributes_field.interning import (
+    get_intern_table,
+    intern_attributes,
+)
+
+
+class AttributesDictTestCase(TestCase):
+
+    def test_modification_resets_raw(self):
+        mutations = [
+            lambda value: value.__setitem__('title', 'x'),
+            lambda value: value.__delitem__('class'),
+            lambda value: value.update(title='x'),
+            lambda value: value.setdefault('title', 'x'),
+            lambda value: value.pop('class'),
+            lambda value: value.popitem(),
+            lambda value: value.clear(),
+        ]
+        for mutate in mutations:
+            value = AttributesDict({'class': 'btn'})
+            value.raw = '{"class": "btn"}'
+            mutate(value)
+            self.assertIsNone(value.raw)
+
+    def test_copy(self):
+        value = AttributesDict({'class': 'btn'})
+        value.raw = '{"class": "btn"}'
+        for clone in (copy.copy(value), copy.deepcopy(value), pickle.loads(pickle.dumps(value))):
+            self.assertIsInstance(clone, AttributesDict)
+            self.assertEqual(clone, value)
+            self.assertEqual(clone.raw, value.raw)
+
+    def test_deepcopy_flat(self):
+        value = AttributesDict({'class': 'btn'})
+        value.raw = '{"class": "btn"}'
+        with mock.patch.object(copy, 'deepcopy') as deepcopy:
+            clone = value.__deepcopy__({})
+        deepcopy.assert_not_called()
+        self.assertEqual((clone, clone.raw), (value, value.raw))
+        value = AttributesDict({'data-list': [1]})
+        self.assertIsNot(copy.deepcopy(value)['data-list'], value['data-list'])
+
+    def test_from_json(self):
+        value = AttributesDict.from_json('{"class": "btn"}')
+        self.assertIs(type(value), LazyAttributesDict)
+        self.assertEqual(value.raw, '{"class": "btn"}')
+        self.assertEqual(value, {'class': 'btn'})
+
+    def test_to_html(self):
+        value = AttributesDict({'class': 'btn', 'title': '<x>'})
+        html = value.to_html()
+        self.assertEqual(html, 'class="btn" title="&lt;x&gt;"')
+        self.assertIs(value.to_html(), html)
+        self.assertEqual(value.to_html(['title']), 'class="btn"')
+        value['id'] = 'main'
+        self.assertEqual(value.to_html(), 'class="btn" title="&lt;x&gt;" id="main"')
+        # Nested values could be modified in place
+        value = AttributesDict({'data-list': [1]})
+        self.assertEqual(value.to_html(), 'data-list="[1]"')
+        value['data-list'].append(2)
+        self.assertEqual(value.to_html(), 'data-list="[1, 2]"')
+
+    def test_canonical_json(self):
+        value = AttributesDict({'title': 'x', 'class': 'btn'})
+        self.assertEqual(value.canonical_json, '{"class":"btn","title":"x"}')
+        self.assertIs(value.canonical_json, value.canonical_json)
+        del value['title']
+        self.assertEqual(value.canonical_json, '{"class":"btn"}')
+
+    def test_freeze(self):
+        value = AttributesDict({'class': 'btn'})
+        value.raw = '{"class": "btn"}'
+        frozen = value.freeze()
+        self.assertIsInstance(frozen, FrozenAttributesDict)
+        self.assertEqual(frozen, value)
+        self.assertEqual(frozen.raw, value.raw)
+        self.assertEqual(hash(frozen), hash(AttributesDict({'class': 'btn'}).freeze()))
+        self.assertEqual(len({frozen, AttributesDict({'class': 'btn'}).freeze()}), 1)
+        mutations = [
+            lambda value: value.__setitem__('title', 'x'),
+            lambda value: value.__delitem__('class'),
+            lambda value: value.update(title='x'),
+            lambda value: value.clear(),
+        ]
+        for mutate in mutations:
+            with self.assertRaises(TypeError):
+                mutate(frozen)
+        self.assertEqual(frozen, {'class': 'btn'})
+        self.assertIs(copy.copy(frozen), frozen)
+        clone = pickle.loads(pickle.dumps(frozen))
+        self.assertIsInstance(clone, FrozenAttributesDict)
+        self.assertEqual((clone, clone.raw), (frozen, frozen.raw))
+        with self.assertRaises(TypeError):
+            hash(AttributesDict({'data-list': [1]}).freeze())
+
+
+class LazyAttributesDictTestCase(TestCase):
+    raw = '{"class": "btn", "title": "x"}'
+
+    def test_loads_on_access(self):
+        operations = [
+            lambda value: value['class'],
+            lambda value: 'class' in value,
+            lambda value: list(value),
+            lambda value: len(value),
+            lambda value: bool(value),
+            lambda value: value.items(),
+            lambda value: value.get('class'),
+            lambda value: dict(value),
+            lambda value: {**value},
+            lambda value: json.dumps(value),
+            lambda value: value == {'class': 'btn', 'title': 'x'},
+            lambda value: {'class': 'btn', 'title': 'x'} == value,
+            lambda value: value == LazyAttributesDict(self.raw),
+        ]
+        for operation in operations:
+            value = LazyAttributesDict(self.raw)
+            self.assertIs(type(value), LazyAttributesDict)
+            result = operation(value)
+            self.assertIs(type(value), AttributesDict)
+            self.assertEqual(value, {'class': 'btn', 'title': 'x'})
+            self.assertEqual(value.raw, self.raw)
+            self.assertTrue(result)
+
+    def test_storage(self):
+        # Built-ins reading the storage of dict subclasses in C, but calling
+        # their overridden methods
+        operations = [
+            lambda value: json.dumps(value, separators=(',', ':')),
+            lambda value: json.dumps({'attributes': value}),
+            lambda value: {}.update(value),
+            lambda value: dict.fromkeys(value),
+            lambda value: sorted(value),
+            lambda value: '%(class)s' % value,
+            lambda value: '{class}'.format_map(value),
+            lambda value: value | {},
+        ]
+        for operation in operations:
+            value = LazyAttributesDict(self.raw)
+            operation(value)
+            self.assertIs(type(value), AttributesDict)
+        self.assertEqual(json.dumps(LazyAttributesDict(self.raw), separators=(',', ':')),
+                         '{"class":"btn","title":"x"}')
+        # Unbound dict methods read the storage as it is: the placeholder
+        # until the instance decoded it
+        value = LazyAttributesDict(self.raw)
+        self.assertIsNone(dict.get(value, 'class'))
+        self.assertNotIn('class', list(dict.keys(value)))
+        len(value)
+        self.assertEqual(dict.get(value, 'class'), 'btn')
+        self.assertEqual(list(dict.items(value)), [('class', 'btn'), ('title', 'x')])
+
+    def test_modification(self):
+        value = LazyAttributesDict(self.raw)
+        value['id'] = 'main'
+        self.assertEqual(value, {'class': 'btn', 'title': 'x', 'id': 'main'})
+        self.assertIsNone(value.raw)
+
+    def test_copy_stays_lazy(self):
+        value = LazyAttributesDict(self.raw)
+        for clone in (copy.copy(value), copy.deepcopy(value), pickle.loads(pickle.dumps(value))):
+            self.assertIs(type(clone), LazyAttributesDict)
+            self.assertEqual(clone.raw, self.raw)
+        self.assertIs(type(value), LazyAttributesDict)
+
+
+class SharedAttributesDictTestCase(TestCase):
+    raw = '{"class": "btn", "title": "x"}'
+
+    def setUp(self):
+        get_intern_table().clear()
+
+    def test_reads_share(self):
+        operations = [
+            lambda value: value['class'] == 'btn',
+            lambda value: 'class' in value,
+            lambda value: list(value) == ['class', 'title'],
+            lambda value: len(value) == 2,
+            lambda value: bool(value),
+            lambda value: list(value.items()) == [('class', 'btn'), ('title', 'x')],
+            lambda value: value.get('class') == 'btn',
+            lambda value: dict(value) == {'class': 'btn', 'title': 'x'},
+            lambda value: {**value} == {'class': 'btn', 'title': 'x'},
+            lambda value: json.loads(json.dumps(value)) == {'class': 'btn', 'title': 'x'},
+            lambda value: value == {'class': 'btn', 'title': 'x'},
+            lambda value: {'class': 'btn', 'title': 'x'} == value,
+            lambda value: value == LazyAttributesDict(self.raw),
+            lambda value: LazyAttributesDict(self.raw) == value,
+            lambda value: AttributesDict({'class': 'btn', 'title': 'x'}) == value,
+            lambda value: value != {'class': 'btn'},
+        ]
+        for operation in operations:
+            value = intern_attributes(self.raw)
+            self.assertIs(type(value), SharedAttributesDict)
+            self.assertTrue(operation(value))
+            self.assertIs(type(value), SharedAttributesDict)
+
+    def test_shared(self):
+        first, second = intern_attributes(self.raw), intern_attributes(self.raw)
+        self.assertIsNot(first, second)
+        self.assertIs(first.shared, second.shared)
+        self.assertEqual(first.raw, self.raw)
+        self.assertEqual((get_intern_table().hits, get_intern_table().misses), (1, 1))
+        # Only flat dicts are shared
+        self.assertIs(type(intern_attributes('{"data-list": [1]}')), dict)
+
+    def test_shared_html(self):
+        first, second = intern_attributes(self.raw), intern_attributes(self.raw)
+        self.assertIs(first.to_html(), second.to_html())
+        self.assertEqual(first.canonical_json, '{"class":"btn","title":"x"}')
+
+    def test_copy_on_write(self):
+        first, second = intern_attributes(self.raw), intern_attributes(self.raw)
+        first['id'] = 'main'
+        self.assertIs(type(first), AttributesDict)
+        self.assertIsNone(first.raw)
+        self.assertEqual(first, {'class': 'btn', 'title': 'x', 'id': 'main'})
+        self.assertEqual(second, {'class': 'btn', 'title': 'x'})
+        self.assertEqual(intern_attributes(self.raw), {'class': 'btn', 'title': 'x'})
+
+    def test_copy_stays_shared(self):
+        value = intern_attributes(self.raw)
+        for clone in (copy.copy(value), copy.deepcopy(value), pickle.loads(pickle.dumps(value))):
+            self.assertIs(type(clone), SharedAttributesDict)
+            self.assertIs(clone.shared, value.shared)
+            self.assertEqual(clone.raw, self.raw)
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_INTERN_TABLE_SIZE=1)
+    def test_bounded(self):
+        first = intern_attributes(self.raw)
+        intern_attributes('{"class": "link"}')
+        self.assertEqual(len(get_intern_table()), 1)
+        self.assertIsNot(intern_attributes(self.raw).shared, first.shared)
@@ -1,10 +1,47 @@
-from django.core.exceptions import ValidationError
+import copy
+from unittest import mock
+
+from django import forms
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection, models
+from django.db.models import F, Value, signals
 from django.db.models.fields import NOT_PROVIDED
+from django.db.models.functions import Cast
+from django.test import override_settings
 from django.test.testcases import TestCase
+from django.test.utils import isolate_apps
+from django.utils.datastructures import MultiValueDict
+from django.utils.safestring import SafeString, mark_safe
 
+from djangocms_attributes_field.codec import get_codec
+from djangocms_attributes_field.datastructures import (
+    AttributesDict,
+    LazyAttributesDict,
+    SharedAttributesDict,
+)
 from djangocms_attributes_field.fields import (
     AttributesField,
     AttributesFormField,
+    AttributesStrDescriptor,
+    ExcludedKeysMatcher,
+)
+from djangocms_attributes_field.interning import get_intern_table
+from djangocms_attributes_field.limits import ExceededAttributes
+from djangocms_attributes_field.rendering import (
+    RENDER_CACHE_VERSION,
+    SharedRenderCache,
+    get_render_cache,
+    get_shared_render_cache,
+    render_attributes,
+)
+
+from .test_app.models import (
+    CanonicalModel,
+    LazyModel,
+    NativeJSONModel,
+    NullableRenderedModel,
+    RenderedModel,
+    TestPlugin,
 )
 
 
@@ -77,6 +114,24 @@ class KeyValidationTests(TestCase):
             with self.assertRaises(ValidationError):
                 field.validate_key(key)
 
+    def test_excluded_keys_matcher(self):
+        matcher = ExcludedKeysMatcher(['Title', 'data-*', 'on*'])
+        self.assertIn('title', matcher)
+        self.assertIn('TITLE', matcher)
+        self.assertIn('data-test', matcher)
+        self.assertIn('onClick', matcher)
+        self.assertNotIn('data', matcher)
+        self.assertNotIn('titles', matcher)
+        self.assertNotIn('class', matcher)
+        self.assertEqual(matcher, ExcludedKeysMatcher(['on*', 'data-*', 'title']))
+        self.assertNotIn('anything', ExcludedKeysMatcher([]))
+
+    def test_wildcard_excluded_keys(self):
+        field = AttributesFormField(excluded_keys=['data-*'])
+        with self.assertRaises(ValidationError):
+            field.validate_key('data-Tracking')
+        field.validate_key('title')
+
 
 class AttributesFieldsTestCase(TestCase):
 
@@ -92,6 +147,42 @@ class AttributesFieldsTestCase(TestCase):
         with self.assertRaises(ValidationError):
             field.validate(None)
 
+    def test_attributes_form_field_collects_errors(self):
+        field = AttributesFormField(excluded_keys=['style'])
+        with self.assertRaises(ValidationError) as context:
+            field.clean({'style': 'x', 'class': 'btn', '1x': 'y', 'data-x': {1, 2}})
+        self.assertEqual(len(context.exception.messages), 3)
+        self.assertIn('"style" is excluded', context.exception.messages[0])
+        self.assertIn('"1x" is not a valid key', context.exception.messages[1])
+        self.assertIn('"data-x" is invalid', context.exception.messages[2])
+
+    def test_attributes_form_field_nested_values(self):
+        field = AttributesFormField()
+        value = field.clean('{"data-list": [1]}')
+        value['data-list'].append(2)
+        self.assertEqual(get_codec().loads(AttributesField().get_prep_value(value)), {'data-list': [1, 2]})
+        self.assertIsNotNone(field.clean('{"class": "btn"}').raw)
+
+    def test_attributes_form_field_serializes_once(self):
+        class LazyModelForm(forms.ModelForm):
+            class Meta:
+                model = LazyModel
+                fields = ['attributes']
+
+        codec = get_codec()
+        data = MultiValueDict({
+            'attributes_key[attributes]': ['class', 'data-list'],
+            'attributes_value[attributes]': ['btn', '[1, 2]'],
+        })
+        with mock.patch.object(codec, 'dumps', wraps=codec.dumps) as dumps:
+            form = LazyModelForm(data)
+            self.assertTrue(form.is_valid())
+            self.assertIsInstance(form.cleaned_data['attributes'], AttributesDict)
+            instance = form.save()
+        self.assertEqual(dumps.call_count, 1)
+        instance.refresh_from_db()
+        self.assertEqual(instance.attributes, {'class': 'btn', 'data-list': '[1, 2]'})
+
     def test_attributes_field(self):
         field = AttributesField(null=True, default={"my": "default"})
         # formfield method
@@ -120,3 +211,695 @@ class AttributesFieldsTestCase(TestCase):
         # validate method
         with self.assertRaises(ValidationError):
             field.validate(None, Noop)
+
+    def test_to_str(self):
+        instance = TestPlugin(
+            attributes1={'class': 'btn', 'download': '', 'onclick': 'alert(1)'},
+            attributes2={'title': '<b>', 'STYLE': 'color: red', 'data-x': 'y'},
+        )
+        self.assertEqual(instance.attributes1_str, 'class="btn" download')
+        self.assertEqual(instance.attributes2_str, 'title="&lt;b&gt;" data-x="y"')
+        self.assertEqual(
+            AttributesField.to_str(instance, 'attributes2'),
+            instance.attributes2_str,
+        )
+
+    def test_get_default(self):
+        default = {'class': 'btn', 'data-count': 1}
+        field = AttributesField(default=default)
+        first, second = field.get_default(), field.get_default()
+        self.assertEqual(first, default)
+        self.assertIsNot(first, default)
+        self.assertIsNot(first, second)
+        first['title'] = 'x'
+        self.assertEqual(field.get_default(), default)
+        # Strings are decoded, callables called every time
+        self.assertEqual(AttributesField(default='{"a": "b"}').get_default(), {'a': 'b'})
+        self.assertEqual(AttributesField(default=lambda: {'a': 'b'}).get_default(), {'a': 'b'})
+        # Nested values are normalized to what the database would return
+        field = AttributesField(default={'data-list': ('a', {'b': 1})})
+        self.assertEqual(field.get_default(), {'data-list': ['a', {'b': 1}]})
+        self.assertIsNot(field.get_default()['data-list'], field.get_default()['data-list'])
+        # Replacing the default is picked up
+        field.default = {'c': 'd'}
+        self.assertEqual(field.get_default(), {'c': 'd'})
+
+    def test_str_descriptor(self):
+        descriptor = TestPlugin.attributes2_str
+        self.assertIsInstance(descriptor, AttributesStrDescriptor)
+        self.assertIs(descriptor.field, TestPlugin._meta.get_field('attributes2'))
+        instance = TestPlugin(attributes2={'style': 'x', 'class': 'y'})
+        self.assertEqual(instance.attributes2_str, 'class="y"')
+        with self.assertRaises(AttributeError):
+            instance.attributes2_str = 'class="z"'
+
+    def test_to_str_many(self):
+        objs = [
+            NativeJSONModel(attributes={'class': 'btn', 'style': 'x'}),
+            LazyModel(attributes={'class': 'btn', 'style': 'x'}),
+            NativeJSONModel(attributes={'class': 'btn', 'style': 'x'}),
+            NativeJSONModel(attributes={'title': 1}),
+            NativeJSONModel(attributes={'title': True}),
+            NativeJSONModel(attributes={'data-list': [1]}),
+            # Equal, but not JSON scalars
+            NativeJSONModel(attributes={'data-x': (1,)}),
+            NativeJSONModel(attributes={'data-x': (1.0,)}),
+        ]
+        with mock.patch(
+            'djangocms_attributes_field.fields.render_attributes',
+            wraps=render_attributes,
+        ) as render:
+            result = AttributesField.to_str_many(objs, 'attributes')
+        self.assertEqual(result, [
+            'class="btn"',
+            'class="btn" style="x"',
+            'class="btn"',
+            'title="1"',
+            'title="True"',
+            'data-list="[1]"',
+            'data-x="(1,)"',
+            'data-x="(1.0,)"',
+        ])
+        self.assertEqual(render.call_count, 7)
+        self.assertEqual(result, [AttributesField.to_str(obj, 'attributes') for obj in objs])
+
+        with self.assertRaises(TypeError):
+            AttributesField.to_str_many(objs, 'id')
+        with self.assertRaises(ImproperlyConfigured):
+            AttributesField.to_str_many(objs, 'missing')
+
+    def test_to_str_queryset(self):
+        first = LazyModel.objects.create(attributes={'class': 'btn'})
+        second = LazyModel.objects.create(attributes={'class': 'btn'})
+        third = LazyModel.objects.create(attributes={})
+        self.assertEqual(
+            AttributesField.to_str_queryset(LazyModel.objects.all(), 'attributes'),
+            {first.pk: 'class="btn"', second.pk: 'class="btn"', third.pk: ''},
+        )
+
+    def test_to_str_instance_cache(self):
+        instance = TestPlugin(attributes1={'class': 'btn'})
+        rendered = instance.attributes1_str
+        self.assertIs(instance.attributes1_str, rendered)
+        # Mutation invalidates the cache
+        instance.attributes1['class'] = 'btn btn-primary'
+        self.assertEqual(instance.attributes1_str, 'class="btn btn-primary"')
+        # ...as does reassignment
+        instance.attributes1 = {'title': 'x'}
+        self.assertEqual(instance.attributes1_str, 'title="x"')
+        # Values that compare equal across types are never served from cache
+        instance.attributes1 = {'title': 1}
+        self.assertEqual(instance.attributes1_str, 'title="1"')
+        instance.attributes1['title'] = True
+        self.assertEqual(instance.attributes1_str, 'title="True"')
+
+    @isolate_apps('tests.test_app')
+    def test_str_accessor_abstract_model(self):
+        class AbstractModel(models.Model):
+            attributes = AttributesField()
+
+            class Meta:
+                abstract = True
+                app_label = 'test_app'
+
+        class ConcreteModel(AbstractModel):
+            pass
+
+        class OtherModel(AbstractModel):
+            attributes_str = 'x'
+
+        self.assertIs(ConcreteModel.attributes_str.field, ConcreteModel._meta.get_field('attributes'))
+        self.assertEqual(ConcreteModel(attributes={'class': 'x'}).attributes_str, 'class="x"')
+        # Existing attributes are not replaced
+        self.assertEqual(OtherModel.attributes_str, 'x')
+
+    def test_to_str_safe_strings(self):
+        # Safe strings are rendered as they are, plain ones never share their output
+        with override_settings(DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE=10):
+            for _ in range(2):
+                instance = TestPlugin(attributes1={'title': mark_safe('<b>')})
+                self.assertEqual(instance.attributes1_str, 'title="<b>"')
+                instance.attributes1 = {'title': '<b>'}
+                self.assertEqual(instance.attributes1_str, 'title="&lt;b&gt;"')
+                instance.attributes1 = {'title': mark_safe('<b>')}
+                self.assertEqual(instance.attributes1_str, 'title="<b>"')
+                self.assertEqual(TestPlugin(attributes1={'title': '<b>'}).attributes1_str, 'title="&lt;b&gt;"')
+
+    def test_to_str_render_cache(self):
+        self.assertIsNone(get_render_cache())
+        with override_settings(DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE=1):
+            cache = get_render_cache()
+            first = TestPlugin(attributes1={'class': 'btn', 'title': 'a'})
+            second = TestPlugin(attributes1={'class': 'btn', 'title': 'a'})
+            self.assertEqual(first.attributes1_str, 'class="btn" title="a"')
+            self.assertEqual(second.attributes1_str, 'class="btn" title="a"')
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            # attributes2 excludes other keys, so it must not share entries
+            self.assertEqual(TestPlugin(attributes2={'style': 'x'}).attributes2_str, '')
+            self.assertEqual(len(cache), 1)
+            # Values that are not JSON scalars are not cached
+            self.assertEqual(TestPlugin(attributes1={'data-x': (1,)}).attributes1_str, 'data-x="(1,)"')
+            self.assertEqual(TestPlugin(attributes1={'data-x': (True,)}).attributes1_str, 'data-x="(True,)"')
+            self.assertEqual(len(cache), 1)
+        self.assertIsNone(get_render_cache())
+
+    @override_settings(
+        CACHES={'render': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'render'}},
+        DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE='render',
+    )
+    def test_to_str_shared_render_cache(self):
+        shared_cache = get_shared_render_cache()
+        shared_cache.cache.clear()
+        attributes = {'class': 'btn', 'title': 'a'}
+        self.assertEqual(TestPlugin(attributes1=attributes).attributes1_str, 'class="btn" title="a"')
+        self.assertEqual((shared_cache.hits, shared_cache.misses), (0, 1))
+        # Another process would find the entry in the shared cache
+        with mock.patch('djangocms_attributes_field.rendering._render') as render:
+            rendered = TestPlugin(attributes1=dict(attributes)).attributes1_str
+            render.assert_not_called()
+        self.assertEqual(rendered, 'class="btn" title="a"')
+        self.assertIsInstance(rendered, SafeString)
+        self.assertEqual((shared_cache.hits, shared_cache.misses), (1, 1))
+        # The order of the attributes is kept
+        self.assertEqual(
+            TestPlugin(attributes1={'title': 'a', 'class': 'btn'}).attributes1_str, 'title="a" class="btn"',
+        )
+        # Entries are keyed by the excluded keys...
+        key = SharedRenderCache.make_key(attributes, ExcludedKeysMatcher(['style']))
+        self.assertNotEqual(key, SharedRenderCache.make_key(attributes, ExcludedKeysMatcher(['style', 'on*'])))
+        self.assertEqual(key, SharedRenderCache.make_key(attributes, ExcludedKeysMatcher(['STYLE'])))
+        # ...and only exist for values of JSON scalars
+        for value in ({'title': mark_safe('<b>')}, {'data-x': {'b': 1, 'a': 2}}, {'data-x': (1,)}):
+            with self.assertRaises(ValueError):
+                SharedRenderCache.make_key(value, ())
+        self.assertEqual(TestPlugin(attributes1={'title': mark_safe('<b>')}).attributes1_str, 'title="<b>"')
+        self.assertEqual(TestPlugin(attributes1={'title': '<b>'}).attributes1_str, 'title="&lt;b&gt;"')
+        self.assertEqual(
+            TestPlugin(attributes1={'data-x': {'b': 1, 'a': 2}}).attributes1_str,
+            'data-x="{&#x27;b&#x27;: 1, &#x27;a&#x27;: 2}"',
+        )
+        self.assertEqual(
+            TestPlugin(attributes1={'data-x': {'a': 2, 'b': 1}}).attributes1_str,
+            'data-x="{&#x27;a&#x27;: 2, &#x27;b&#x27;: 1}"',
+        )
+        self.assertEqual(TestPlugin(attributes1={'data-x': [1]}).attributes1_str, 'data-x="[1]"')
+        self.assertEqual(TestPlugin(attributes1={'data-x': (1,)}).attributes1_str, 'data-x="(1,)"')
+        # ...and versioned
+        shared_cache.set(key, 'x')
+        self.assertEqual(shared_cache.cache.get(key, version=RENDER_CACHE_VERSION), 'x')
+        self.assertIsNone(shared_cache.cache.get(key, version=RENDER_CACHE_VERSION + 1))
+
+    @override_settings(
+        CACHES={'render': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'render'}},
+        DJANGOCMS_ATTRIBUTES_FIELD_SHARED_RENDER_CACHE='render',
+        DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE=10,
+    )
+    def test_to_str_both_render_caches(self):
+        cache, shared_cache = get_render_cache(), get_shared_render_cache()
+        shared_cache.cache.clear()
+        for _ in range(3):
+            self.assertEqual(TestPlugin(attributes1={'class': 'btn'}).attributes1_str, 'class="btn"')
+        # The process-wide cache is consulted first
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+        self.assertEqual((shared_cache.hits, shared_cache.misses), (0, 1))
+
+
+class NativeJSONTestCase(TestCase):
+
+    def test_field(self):
+        field = NativeJSONModel._meta.get_field('attributes')
+        self.assertEqual(field.get_internal_type(), 'JSONField')
+        self.assertEqual(field.db_type(connection), connection.data_types['JSONField'])
+        self.assertEqual(field.deconstruct()[3], {'default': dict, 'native_json': True})
+        self.assertNotIn('native_json', AttributesField().deconstruct()[3])
+        self.assertEqual(field.check(databases=['default']), [])
+        self.assertEqual(field.get_placeholder('{}', None, connection), '%s')
+        # An empty string is not valid JSON
+        field = AttributesField(native_json=True, blank=True)
+        self.assertEqual(field.get_prep_value(None), '{}')
+
+    def test_roundtrip(self):
+        NativeJSONModel.objects.create(attributes={'class': 'btn', 'style': 'x'})
+        instance = NativeJSONModel.objects.get()
+        self.assertEqual(instance.attributes, {'class': 'btn', 'style': 'x'})
+        self.assertEqual(instance.attributes_str, 'class="btn"')
+        NativeJSONModel.objects.update(attributes={'title': 'y'})
+        instance.refresh_from_db()
+        self.assertEqual(instance.attributes, {'title': 'y'})
+
+
+class LazyTestCase(TestCase):
+
+    def test_from_db_value(self):
+        field = AttributesField(lazy=True)
+        self.assertIsInstance(field.from_db_value('{"a": "b"}'), LazyAttributesDict)
+        self.assertEqual(field.from_db_value('["a"]'), ['a'])
+        self.assertIsNone(field.from_db_value(None))
+
+    def test_roundtrip(self):
+        LazyModel.objects.create(attributes={'class': 'btn'})
+        instance = LazyModel.objects.get()
+        self.assertIs(type(instance.attributes), LazyAttributesDict)
+        # Saving an untouched value writes the stored JSON back
+        raw = instance.attributes.raw
+        self.assertIsNotNone(raw)
+        self.assertIs(LazyModel._meta.get_field('attributes').get_prep_value(instance.attributes), raw)
+        instance.save()
+        self.assertIs(type(instance.attributes), LazyAttributesDict)
+
+        self.assertEqual(instance.attributes_str, 'class="btn"')
+        instance.attributes['title'] = 'x'
+        instance.save()
+        self.assertEqual(
+            LazyModel.objects.get().attributes,
+            {'class': 'btn', 'title': 'x'},
+        )
+
+
+class CanonicalTestCase(TestCase):
+
+    def test_field(self):
+        field = CanonicalModel._meta.get_field('attributes')
+        self.assertNotIn('canonical', field.deconstruct()[3])
+        self.assertEqual(field.get_prep_value({'title': 'x', 'class': 'btn'}), '{"class":"btn","title":"x"}')
+        self.assertTrue(field.formfield().canonical)
+        self.assertEqual(
+            field.formfield().clean({'title': 'x', 'class': 'btn'}).raw,
+            '{"class":"btn","title":"x"}',
+        )
+
+    def test_roundtrip(self):
+        CanonicalModel.objects.create(attributes={'title': 'x', 'class': 'btn'})
+        CanonicalModel.objects.create(attributes={'class': 'btn', 'title': 'x'})
+        self.assertEqual(
+            set(CanonicalModel.objects.values_list(Cast('attributes', models.TextField()), flat=True)),
+            {'{"class":"btn","title":"x"}'},
+        )
+
+    def test_not_canonical_row(self):
+        # Stored before the field was canonical
+        CanonicalModel.objects.create()
+        CanonicalModel.objects.update(attributes=Value('{"title": "x", "class": "btn"}'))
+        obj = CanonicalModel.objects.get()
+        self.assertEqual(obj.attributes.canonical_json, '{"class":"btn","title":"x"}')
+        field = CanonicalModel._meta.get_field('attributes')
+        self.assertEqual(field.get_prep_value(obj.attributes), '{"title": "x", "class": "btn"}')
+        obj.attributes['id'] = 'main'
+        self.assertEqual(field.get_prep_value(obj.attributes), '{"class":"btn","id":"main","title":"x"}')
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE=10)
+    def test_render_cache_key(self):
+        CanonicalModel.objects.create(attributes={'title': 'x', 'class': 'btn'})
+        CanonicalModel.objects.create(attributes={'class': 'btn', 'title': 'x'})
+        first, second = CanonicalModel.objects.all()
+        with mock.patch.object(get_codec(), 'dumps') as dumps:
+            self.assertEqual(first.attributes_str, 'class="btn" title="x"')
+            self.assertEqual(second.attributes_str, 'class="btn" title="x"')
+        dumps.assert_not_called()
+        self.assertEqual((get_render_cache().hits, get_render_cache().misses), (1, 1))
+
+
+class ValueTypeTestCase(TestCase):
+
+    def test_from_db_value(self):
+        field = AttributesField()
+        value = field.from_db_value('{"class": "btn"}')
+        self.assertIs(type(value), AttributesDict)
+        self.assertEqual(value.raw, '{"class": "btn"}')
+        # Nested values could be modified without resetting `raw`
+        value = field.from_db_value('{"data-list": [1]}')
+        self.assertIs(type(value), AttributesDict)
+        self.assertIsNone(value.raw)
+        self.assertIs(type(field.from_db_value({'class': 'btn'})), AttributesDict)
+
+    def test_to_str(self):
+        TestPlugin.objects.create(attributes1={'class': 'btn', 'style': 'x'}, attributes2={'style': 'x'})
+        instance = TestPlugin.objects.get()
+        with mock.patch(
+            'djangocms_attributes_field.rendering.render_attributes',
+            wraps=render_attributes,
+        ) as render:
+            self.assertEqual(instance.attributes1_str, 'class="btn" style="x"')
+            self.assertEqual(instance.attributes1_str, 'class="btn" style="x"')
+            self.assertEqual(instance.attributes2_str, '')
+        self.assertEqual(render.call_count, 2)
+        instance.attributes1['title'] = 'x'
+        self.assertEqual(instance.attributes1_str, 'class="btn" style="x" title="x"')
+
+    def test_canonical_prep_value(self):
+        field = CanonicalModel._meta.get_field('attributes')
+        value = AttributesDict({'title': 'x', 'class': 'btn'})
+        self.assertEqual(field.get_prep_value(value), '{"class":"btn","title":"x"}')
+        self.assertIs(field.get_prep_value(value), value.canonical_json)
+
+
+class DirtyTrackingTestCase(TestCase):
+
+    def test_is_dirty(self):
+        field = LazyModel._meta.get_field('attributes')
+        LazyModel.objects.create(attributes={'class': 'btn', 'data-list': [1]})
+        instance = LazyModel.objects.get()
+        self.assertFalse(field.is_dirty(instance))
+        instance.attributes['data-list'].append(2)
+        self.assertTrue(field.is_dirty(instance))
+        instance.attributes['data-list'].pop()
+        self.assertFalse(field.is_dirty(instance))
+        instance.attributes = {'class': 'btn', 'data-list': [1]}
+        self.assertTrue(field.is_dirty(instance))
+
+        field = TestPlugin._meta.get_field('attributes1')
+        TestPlugin.objects.create(attributes1={'class': 'btn'})
+        instance = TestPlugin.objects.get()
+        self.assertFalse(field.is_dirty(instance))
+        instance.attributes1['class'] = 'link'
+        self.assertTrue(field.is_dirty(instance))
+        self.assertFalse(field.is_dirty(TestPlugin.objects.defer('attributes1').get()))
+        self.assertTrue(field.is_dirty(TestPlugin(attributes1={})))
+        instance.attributes1 = AttributesDict.from_json('{"class": "btn"}')
+        self.assertTrue(field.is_dirty(instance))
+
+    def test_is_dirty_other_instance(self):
+        field = TestPlugin._meta.get_field('attributes1')
+        TestPlugin.objects.create(attributes1={'class': 'a'})
+        TestPlugin.objects.create(attributes1={'class': 'b'})
+        first, second = TestPlugin.objects.order_by('pk')
+        second.attributes1 = first.attributes1
+        self.assertFalse(field.is_dirty(first))
+        self.assertTrue(field.is_dirty(second))
+        self.assertEqual(AttributesField.get_update_fields(second, ['attributes1']), ['attributes1'])
+        second.save(update_fields=AttributesField.get_update_fields(second))
+        self.assertEqual(TestPlugin.objects.get(pk=second.pk).attributes1, {'class': 'a'})
+
+        second.attributes1 = copy.copy(TestPlugin.objects.get(pk=first.pk).attributes1)
+        self.assertTrue(field.is_dirty(second))
+        # Copies of instances keep their state
+        self.assertFalse(field.is_dirty(copy.copy(first)))
+        self.assertFalse(field.is_dirty(copy.deepcopy(first)))
+
+    def test_get_update_fields(self):
+        TestPlugin.objects.create(label='x', attributes1={'class': 'btn'}, attributes2={})
+        instance = TestPlugin.objects.get()
+        update_fields = AttributesField.get_update_fields(instance)
+        self.assertIn('label', update_fields)
+        self.assertIn('position', update_fields)
+        self.assertNotIn('attributes1', update_fields)
+        self.assertNotIn('attributes2', update_fields)
+        self.assertNotIn('cmsplugin_ptr', update_fields)
+
+        instance.attributes2['title'] = 'x'
+        self.assertEqual(
+            AttributesField.get_update_fields(instance, ['label', 'attributes1', 'attributes2']),
+            ['label', 'attributes2'],
+        )
+        instance = TestPlugin.objects.only('attributes1').get()
+        self.assertEqual(AttributesField.get_update_fields(instance), [])
+
+        LazyModel.objects.create(attributes={'class': 'btn'})
+        instance = LazyModel.objects.get()
+        with self.assertNumQueries(0):
+            instance.save(update_fields=AttributesField.get_update_fields(instance))
+
+    def test_untracked(self):
+        # Nothing is recorded when loading instances without track_changes
+        self.assertFalse(signals.post_init.has_listeners(CanonicalModel))
+        self.assertTrue(signals.post_init.has_listeners(LazyModel))
+        CanonicalModel.objects.create(attributes={'class': 'btn'})
+        instance = CanonicalModel.objects.get()
+        self.assertNotIn('_attributes_loaded', instance.__dict__)
+        self.assertTrue(CanonicalModel._meta.get_field('attributes').is_dirty(instance))
+        self.assertEqual(AttributesField.get_update_fields(instance), ['attributes'])
+
+
+class RawPassthroughTestCase(TestCase):
+
+    def test_bulk_create(self):
+        raw = '{"class": "btn",  "title": "x"}'
+        with mock.patch('djangocms_attributes_field.codec.get_codec') as get_codec:
+            LazyModel.objects.bulk_create([
+                LazyModel(attributes=AttributesDict.from_json(raw)) for _ in range(3)
+            ])
+            objs = list(LazyModel.objects.all())
+            for obj in objs:
+                obj.attributes = AttributesDict.from_json('{"title": "y"}')
+            LazyModel.objects.bulk_update(objs, ['attributes'])
+        get_codec.assert_not_called()
+        self.assertEqual(
+            list(LazyModel.objects.values_list(Cast('attributes', models.TextField()), flat=True)),
+            ['{"title": "y"}'] * 3,
+        )
+
+    def test_canonical(self):
+        # Canonical fields only write JSON as is if it is known to be canonical
+        CanonicalModel.objects.bulk_create([
+            CanonicalModel(attributes=AttributesDict.from_json('{"title": "x",  "class": "btn"}')),
+        ])
+        stored = CanonicalModel.objects.values_list(Cast('attributes', models.TextField()), flat=True)
+        self.assertEqual(stored.get(), '{"class":"btn","title":"x"}')
+        objs = list(CanonicalModel.objects.all())
+        with mock.patch('djangocms_attributes_field.codec.get_codec') as get_codec:
+            CanonicalModel.objects.bulk_update(objs, ['attributes'])
+            CanonicalModel.objects.bulk_create([CanonicalModel(attributes=copy.deepcopy(objs[0].attributes))])
+        get_codec.assert_not_called()
+        self.assertEqual(list(stored), ['{"class":"btn","title":"x"}'] * 2)
+
+
+class InternTestCase(TestCase):
+
+    def test_from_db_value(self):
+        field = AttributesField(intern=True)
+        first = field.from_db_value('{"target": "_blank"}')
+        second = field.from_db_value('{"target": "_blank"}')
+        self.assertIsInstance(first, SharedAttributesDict)
+        self.assertIs(first.shared, second.shared)
+        self.assertEqual(field.get_prep_value(first), '{"target": "_blank"}')
+        self.assertEqual(field.from_db_value('["a"]'), ['a'])
+        self.assertNotIn('intern', field.deconstruct()[3])
+
+    def test_not_shared(self):
+        table = get_intern_table()
+        table.clear()
+        field = AttributesField(intern=True)
+        for _ in range(2):
+            value = field.from_db_value('{"data-list": [1]}')
+            self.assertIs(type(value), AttributesDict)
+            self.assertEqual(value, {'data-list': [1]})
+            self.assertEqual(value._stored, '{"data-list": [1]}')
+        # Remembered not to be shared
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_to_str(self):
+        instance = LazyModel(attributes=AttributesField(intern=True).from_db_value('{"target": "_blank"}'))
+        self.assertEqual(instance.attributes_str, 'target="_blank"')
+        instance.attributes['class'] = 'btn'
+        self.assertEqual(instance.attributes_str, 'target="_blank" class="btn"')
+
+
+class LookupTestCase(TestCase):
+
+    def setUp(self):
+        self.blank = LazyModel.objects.create(attributes={'target': '_blank', 'class': 'btn'})
+        self.self = LazyModel.objects.create(attributes={'target': '_self', 'data': {'id': 1}})
+        self.empty = LazyModel.objects.create(attributes={})
+        # Stored as an empty string, which is not valid JSON
+        LazyModel.objects.filter(pk=self.empty.pk).update(attributes=models.Value(''))
+
+    def assertMatches(self, model, lookups, expected):
+        self.assertEqual(
+            set(model.objects.filter(**lookups).values_list('pk', flat=True)),
+            {obj.pk for obj in expected},
+        )
+
+    def test_key_transform(self):
+        self.assertMatches(LazyModel, {'attributes__target': '_blank'}, [self.blank])
+        self.assertMatches(LazyModel, {'attributes__target__startswith': '_'}, [self.blank, self.self])
+        self.assertMatches(LazyModel, {'attributes__target__isnull': True}, [self.empty])
+        self.assertMatches(LazyModel, {'attributes__data__id': 1}, [self.self])
+        self.assertEqual(
+            list(LazyModel.objects.order_by('pk').values_list('attributes__target', flat=True)),
+            ['_blank', '_self', None],
+        )
+        # Regular lookups still work on the stored text
+        self.assertMatches(LazyModel, {'attributes__contains': '_blank'}, [self.blank])
+
+    def test_has_key(self):
+        self.assertMatches(LazyModel, {'attributes__has_key': 'class'}, [self.blank])
+        self.assertMatches(LazyModel, {'attributes__has_keys': ['target', 'data']}, [self.self])
+        self.assertMatches(LazyModel, {'attributes__has_any_keys': ['class', 'data']}, [self.blank, self.self])
+
+    def test_native_json(self):
+        instance = NativeJSONModel.objects.create(attributes={'target': '_blank'})
+        NativeJSONModel.objects.create(attributes={})
+        self.assertMatches(NativeJSONModel, {'attributes__target': '_blank'}, [instance])
+        self.assertMatches(NativeJSONModel, {'attributes__has_key': 'target'}, [instance])
+
+    def test_index(self):
+        index = models.Index(F('attributes__target'), name='target_idx')
+        sql = str(index.create_sql(LazyModel, connection.schema_editor()))
+        self.assertIn('NULLIF("attributes", \'\')', sql)
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+        self.assertMatches(LazyModel, {'attributes__target': '_blank'}, [self.blank])
+
+
+class LimitsTestCase(TestCase):
+
+    def get_form(self, keys, values, **kwargs):
+        class AttributesForm(forms.Form):
+            attributes = AttributesFormField(**kwargs)
+
+        return AttributesForm(MultiValueDict({
+            'attributes_key[attributes]': keys,
+            'attributes_value[attributes]': values,
+        }))
+
+    def test_limits(self):
+        form = self.get_form(['class', 'title', ''], ['btn', 'a', ''], max_keys=2)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['attributes'], {'class': 'btn', 'title': 'a'})
+
+        cases = [
+            ({'max_keys': 2}, ['a', 'b', 'c'], ['', '', ''], 'max_keys'),
+            ({'max_key_length': 3}, ['abcd'], [''], 'max_key_length'),
+            ({'max_value_length': 3}, ['title'], ['abcd'], 'max_value_length'),
+            # "title" and "é" are 5 + 2 bytes
+            ({'max_bytes': 6}, ['title'], ['é'], 'max_bytes'),
+        ]
+        for kwargs, keys, values, code in cases:
+            with self.subTest(code=code):
+                form = self.get_form(keys, values, **kwargs)
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors.as_data()['attributes'][0].code, code)
+
+    def test_limits_render(self):
+        # The rejected form shows all submitted pairs
+        form = self.get_form(['class', 'title', '', 'alt'], ['btn', 'abcd', '', 'b'], max_value_length=3)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['attributes'][0].code, 'max_value_length')
+        html = str(form['attributes'])
+        self.assertEqual(html.count('class="form-row attributes-pair"'), 4)
+        for text in ('value="class"', 'value="title"', 'value="abcd"', 'value="alt"'):
+            self.assertIn(text, html)
+        # Up to a bound
+        with mock.patch.object(ExceededAttributes, 'max_items', 2):
+            form = self.get_form(['class', 'title', 'alt'], ['btn', 'a', 'b'], max_keys=1)
+            self.assertFalse(form.is_valid())
+            self.assertEqual(str(form['attributes']).count('class="form-row attributes-pair"'), 3)
+
+    def test_limits_stop_early(self):
+        form = self.get_form([f'data-{i}' for i in range(10000)], [''] * 10000, max_keys=10)
+        with mock.patch.object(AttributesFormField, 'validate_key') as validate_key:
+            self.assertFalse(form.is_valid())
+        validate_key.assert_not_called()
+        self.assertEqual(form.errors['attributes'], ['Ensure there are at most 10 attributes.'])
+
+    def test_limits_form_field(self):
+        field = AttributesFormField(max_keys=1)
+        with self.assertRaises(ValidationError) as cm:
+            field.clean({'class': 'btn', 'title': 'a'})
+        self.assertEqual(cm.exception.code, 'max_keys')
+        # Also applies to JSON documents
+        with self.assertRaises(ValidationError):
+            field.clean('{"class": "btn", "title": "a"}')
+        self.assertEqual(field.clean({'class': 'btn'}), {'class': 'btn'})
+
+    def test_limits_model_field(self):
+        field = AttributesField(max_keys=5, max_bytes=1000)
+        self.assertEqual(field.deconstruct()[3], {'default': dict})
+        form_field = field.formfield()
+        self.assertEqual((form_field.limits.max_keys, form_field.limits.max_bytes), (5, 1000))
+        self.assertIs(form_field.widget.limits, form_field.limits)
+        self.assertFalse(AttributesField().formfield().limits)
+
+
+class StoreRenderedTestCase(TestCase):
+
+    def stored(self, model=RenderedModel):
+        # The rendered attributes without the digest
+        stored = model.objects.values_list('attributes_rendered', flat=True).get()
+        return stored if stored is None else stored.split(':', 1)[1]
+
+    def test_store_rendered(self):
+        field = RenderedModel._meta.get_field('attributes')
+        self.assertEqual(field.deconstruct()[3], {'default': dict, 'store_rendered': True})
+        self.assertIs(RenderedModel._meta.get_field('attributes_rendered'), field.rendered_field)
+        self.assertFalse(field.rendered_field.editable)
+
+        obj = RenderedModel.objects.create(attributes={'class': 'btn', 'style': 'x', 'title': '<b>'})
+        self.assertEqual(self.stored(), 'class="btn" title="&lt;b&gt;"')
+        self.assertEqual(
+            obj.attributes_rendered,
+            field.rendered_field.get_digest('{"class": "btn", "style": "x", "title": "<b>"}') + ':' + self.stored(),
+        )
+        with mock.patch('djangocms_attributes_field.rendering._render') as render:
+            obj = RenderedModel.objects.get()
+            self.assertEqual(obj.attributes_str, 'class="btn" title="&lt;b&gt;"')
+            self.assertIsInstance(obj.attributes_str, SafeString)
+            self.assertEqual(AttributesField.to_str_many([obj], 'attributes'), ['class="btn" title="&lt;b&gt;"'])
+            with self.assertNumQueries(1):
+                obj = RenderedModel.objects.defer('attributes').get()
+                self.assertEqual(obj.attributes_str, 'class="btn" title="&lt;b&gt;"')
+            render.assert_not_called()
+
+        # Modified or reassigned attributes are rendered
+        obj = RenderedModel.objects.get()
+        obj.attributes['title'] = 'x'
+        self.assertEqual(obj.attributes_str, 'class="btn" title="x"')
+        obj.attributes = {'title': 'y'}
+        self.assertEqual(obj.attributes_str, 'title="y"')
+        self.assertEqual(
+            AttributesField.get_update_fields(obj, ['attributes', 'attributes_rendered']),
+            ['attributes', 'attributes_rendered'],
+        )
+        obj.save(update_fields=AttributesField.get_update_fields(obj, ['attributes']))
+        self.assertEqual(self.stored(), 'title="y"')
+
+        # As are rows without a rendered column
+        RenderedModel.objects.update(attributes_rendered=None)
+        self.assertEqual(RenderedModel.objects.get().attributes_str, 'title="y"')
+        self.assertEqual(list(AttributesField.to_str_queryset(RenderedModel.objects.all(), 'attributes').values()),
+                         ['title="y"'])
+        self.assertEqual(AttributesField.get_update_fields(RenderedModel.objects.get(), ['attributes']), [])
+
+    def test_store_rendered_other_instance(self):
+        first = RenderedModel.objects.create(attributes={'class': 'a'})
+        RenderedModel.objects.create(attributes={'class': 'b'})
+        first, second = RenderedModel.objects.order_by('pk')
+        # The loaded attributes of another instance do not match its column
+        second.attributes = first.attributes
+        self.assertEqual(second.attributes_str, 'class="a"')
+        self.assertEqual(AttributesField.to_str_many([second], 'attributes'), ['class="a"'])
+        second.save()
+        self.assertEqual(
+            RenderedModel.objects.values_list('attributes_rendered', flat=True).get(pk=second.pk).split(':', 1)[1],
+            'class="a"',
+        )
+
+    def test_store_rendered_stale(self):
+        RenderedModel.objects.create(attributes={'class': 'btn', 'title': 'x'})
+        field = RenderedModel._meta.get_field('attributes')
+        # After excluded_keys changed...
+        with mock.patch.object(field, 'excluded_keys_matcher', ExcludedKeysMatcher(['title'])):
+            self.assertEqual(RenderedModel.objects.get().attributes_str, 'class="btn"')
+            self.assertEqual(RenderedModel.objects.defer('attributes').get().attributes_str, 'class="btn"')
+            self.assertEqual(list(AttributesField.to_str_queryset(RenderedModel.objects.all(), 'attributes').values()),
+                             ['class="btn"'])
+        # ...or the attributes were written without rendering them
+        RenderedModel.objects.update(attributes={'onmouseover': 'x', 'class': 'evil'})
+        self.assertEqual(RenderedModel.objects.get().attributes_str, 'class="evil"')
+        objs = list(RenderedModel.objects.all())
+        objs[0].attributes = {'title': 'y'}
+        RenderedModel.objects.bulk_update(objs, ['attributes'])
+        self.assertEqual(RenderedModel.objects.get().attributes_str, 'title="y"')
+        # Rows rendered by another version
+        RenderedModel.objects.update(attributes_rendered='title="y"')
+        self.assertIsNone(field.get_stored_html(RenderedModel.objects.get()))
+
+    def test_store_rendered_null(self):
+        obj = NullableRenderedModel.objects.create(attributes=None)
+        self.assertIsNone(obj.attributes_rendered)
+        obj.attributes = {'class': 'btn'}
+        obj.save()
+        self.assertEqual(self.stored(NullableRenderedModel), 'class="btn"')
+        obj.attributes = None
+        obj.save()
+        self.assertIsNone(self.stored(NullableRenderedModel))
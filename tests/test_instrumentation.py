@@ -0,0 +1,84 @@
+from django.test import TestCase, override_settings
+
+from djangocms_attributes_field import instrumentation
+from djangocms_attributes_field.fields import AttributesFormField
+from djangocms_attributes_field.widgets import AttributesWidget
+
+from .test_app.models import LazyModel, TestPlugin
+
+
+class InstrumentationTestCase(TestCase):
+
+    def setUp(self):
+        instrumentation.reset_stats()
+        self.addCleanup(instrumentation.reset_stats)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.is_enabled())
+        LazyModel.objects.create(attributes={'class': 'btn'})
+        self.assertEqual(instrumentation.get_stats()['encode']['calls'], 0)
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_INSTRUMENTATION=True)
+    def test_counters(self):
+        instance = TestPlugin.objects.create(attributes1={'class': 'btn'}, attributes2={})
+        instance = TestPlugin.objects.get(pk=instance.pk)
+        self.assertEqual(instance.attributes1_str, 'class="btn"')
+        self.assertEqual(instance.attributes1_str, 'class="btn"')
+        AttributesFormField().validate({'class': 'btn', 'title': 'x'})
+        html = AttributesWidget().render('attributes', {'class': 'btn'})
+
+        stats = instrumentation.get_stats()
+        self.assertEqual(stats['encode']['calls'], 2)
+        self.assertEqual(stats['encode']['size'], len('{"class": "btn"}') + len('{}'))
+        self.assertEqual(stats['decode']['calls'], 2)
+        self.assertEqual(stats['decode']['size'], len('{"class": "btn"}') + len('{}'))
+        self.assertEqual(stats['validate'], {'calls': 1, 'time': stats['validate']['time'], 'size': 2})
+        # The second access is served from the per-instance cache
+        self.assertEqual(stats['render']['calls'], 2)
+        self.assertEqual(stats['render']['size'], 2 * len('class="btn"'))
+        self.assertEqual(stats['widget_render']['calls'], 1)
+        self.assertEqual(stats['widget_render']['size'], len(html))
+        self.assertGreater(stats['encode']['time'], 0)
+        self.assertNotIn('render_cache', stats)
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_INSTRUMENTATION=True)
+    def test_lazy_decode(self):
+        instance = LazyModel.objects.create(attributes={'class': 'btn'})
+        instance = LazyModel.objects.get(pk=instance.pk)
+        self.assertEqual(instrumentation.get_stats()['decode']['calls'], 0)
+        self.assertEqual(instance.attributes['class'], 'btn')
+        self.assertEqual(instrumentation.get_stats()['decode']['calls'], 1)
+
+    @override_settings(
+        DJANGOCMS_ATTRIBUTES_FIELD_INSTRUMENTATION=True,
+        DJANGOCMS_ATTRIBUTES_FIELD_RENDER_CACHE_SIZE=10,
+    )
+    def test_render_cache_stats(self):
+        TestPlugin(attributes1={'class': 'btn'}).attributes1_str
+        TestPlugin(attributes1={'class': 'btn'}).attributes1_str
+        self.assertEqual(
+            instrumentation.get_stats()['render_cache'],
+            {'hits': 1, 'misses': 1, 'size': 1},
+        )
+
+    def test_enable_disable(self):
+        try:
+            instrumentation.enable()
+            AttributesFormField().validate({'class': 'btn'})
+            instrumentation.disable()
+            AttributesFormField().validate({'class': 'btn'})
+        finally:
+            instrumentation._enabled = None
+        self.assertEqual(instrumentation.get_stats()['validate']['calls'], 1)
+
+    @override_settings(DJANGOCMS_ATTRIBUTES_FIELD_INSTRUMENTATION=True)
+    def test_signal(self):
+        received = []
+
+        def handler(sender, duration, size, **kwargs):
+            received.append((sender, size))
+
+        instrumentation.attributes_measured.connect(handler)
+        self.addCleanup(instrumentation.attributes_measured.disconnect, handler)
+        TestPlugin(attributes1={'class': 'btn'}).attributes1_str
+        self.assertEqual(received, [('render', len('class="btn"'))])
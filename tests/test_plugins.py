@@ -1,8 +1,11 @@
 import warnings
+from unittest import mock
 
 from cms import __version__
 from cms.api import add_plugin, create_page
+from cms.models import Placeholder
 from cms.test_utils.testcases import CMSTestCase
+from cms.utils.plugins import copy_plugins_to_placeholder
 
 from .test_app.cms_plugins import TestPluginPlugin
 
@@ -49,6 +52,24 @@ class TestPluginTestCase(CMSTestCase):
         self.assertContains(response, "class")
         self.assertContains(response, "some new classes")
 
+    def test_copy_plugins(self):
+        add_plugin(
+            placeholder=self.placeholder,
+            plugin_type=TestPluginPlugin.__name__,
+            language=self.language,
+            attributes1={"data-tracking": "google"},
+            attributes2={"class": "some new classes"},
+        )
+        target = Placeholder.objects.create(slot="target")
+        plugins = list(self.placeholder.get_plugins(self.language))
+        # The stored attributes are written as they are
+        with mock.patch("djangocms_attributes_field.fields.encode") as encode:
+            copy_plugins_to_placeholder(plugins, target, language=self.language)
+        encode.assert_not_called()
+        copy = target.get_plugins(self.language).get().get_bound_plugin()
+        self.assertEqual(copy.attributes1, {"data-tracking": "google"})
+        self.assertEqual(copy.attributes2, {"class": "some new classes"})
+
     def test_plugin_form(self):
         request_url = self.get_add_plugin_uri(
             placeholder=self.placeholder,
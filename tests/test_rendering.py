@@ -0,0 +1,50 @@
+import random
+
+from django.test.testcases import TestCase
+from django.utils.functional import lazy
+from django.utils.html import conditional_escape, mark_safe
+
+from djangocms_attributes_field.rendering import _render
+
+
+def reference_render(value, excluded_keys=()):
+    # The output before the fast path for strings without escaped characters
+    return ' '.join(
+        f'{key}="{conditional_escape(val)}"' if val else key
+        for key, val in value.items() if key not in excluded_keys
+    )
+
+
+class RenderTestCase(TestCase):
+
+    def random_value(self, rng):
+        alphabet = 'abc -_:/.#0123456789&<>"\'äé€😀\n\t=;'
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        kind = rng.randrange(8)
+        if kind == 0:
+            return mark_safe(text)
+        if kind == 1:
+            return rng.choice([0, 1, -5, 2.5, True, False, None])
+        if kind == 2:
+            return lazy(lambda: text, str)()
+        if kind == 3:
+            # Tokens without escaped characters, the common case
+            return ''.join(rng.choice('abcdefgh-_ ') for _ in range(rng.randint(1, 20)))
+        return text
+
+    def test_fast_path(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            value = {f'data-{i}': self.random_value(rng) for i in range(rng.randint(0, 5))}
+            rendered = _render(value, ())
+            self.assertEqual(rendered, reference_render(value))
+            self.assertEqual(rendered.encode(), reference_render(value).encode())
+
+    def test_escaping(self):
+        self.assertEqual(
+            _render({'class': 'btn btn-primary', 'title': '<a href="#">\'&\'</a>', 'alt': mark_safe('<b>')}, ()),
+            'class="btn btn-primary" title="&lt;a href=&quot;#&quot;&gt;&#x27;&amp;&#x27;&lt;/a&gt;" alt="<b>"',
+        )
+        self.assertEqual(
+            _render({'tabindex': 1, 'hidden': '', 'data-x': True}, ()), 'tabindex="1" hidden data-x="True"',
+        )
@@ -0,0 +1,102 @@
+from unittest import mock, skipUnless
+
+from django.template import Context, Template
+from django.test.testcases import TestCase
+
+from djangocms_attributes_field.fields import (
+    AttributesField,
+    ExcludedKeysMatcher,
+    get_excluded_keys_matcher,
+)
+from djangocms_attributes_field.rendering import merge_attributes
+
+try:
+    import jinja2
+except ImportError:  # pragma: no cover
+    jinja2 = None
+
+
+class MergeAttributesTestCase(TestCase):
+
+    def test_merge_attributes(self):
+        self.assertEqual(
+            merge_attributes({'class': 'btn', 'title': 'a'}, None, {'class': 'btn btn-lg', 'title': 'b'}),
+            {'class': 'btn btn-lg', 'title': 'b'},
+        )
+        self.assertEqual(merge_attributes({'class': ''}, {'class': 'btn'}), {'class': 'btn'})
+        self.assertEqual(merge_attributes({'class': 'btn'}, {'class': ''}), {'class': ''})
+        self.assertEqual(merge_attributes(), {})
+
+    def test_get_excluded_keys_matcher(self):
+        matcher = get_excluded_keys_matcher('style, Title')
+        self.assertEqual(matcher, ExcludedKeysMatcher(['style', 'title', 'src', 'href', 'data', 'action', 'on*']))
+        self.assertIs(matcher, get_excluded_keys_matcher(['style', 'title']))
+        self.assertIs(get_excluded_keys_matcher(matcher), matcher)
+
+
+class RenderAttributesTagTestCase(TestCase):
+
+    def render(self, template, **context):
+        return Template('{% load attributes_field_tags %}' + template).render(Context(context))
+
+    def test_render_attributes(self):
+        defaults = {'class': 'btn', 'title': '<b>'}
+        attributes = {'class': 'btn btn-lg', 'onclick': 'x', 'style': 'y'}
+        self.assertEqual(
+            self.render('<a {% render_attributes defaults attributes %}>', defaults=defaults, attributes=attributes),
+            '<a class="btn btn-lg" title="&lt;b&gt;" style="y">',
+        )
+        self.assertEqual(
+            self.render('<a {% render_attributes defaults attributes excluded_keys="style,title" %}>',
+                        defaults=defaults, attributes=attributes),
+            '<a class="btn btn-lg">',
+        )
+        self.assertEqual(
+            self.render('{% render_attributes missing defaults as attrs %}[{{ attrs }}]', defaults=defaults),
+            '[class="btn" title="&lt;b&gt;"]',
+        )
+        self.assertEqual(self.render('{% render_attributes %}'), '')
+
+    def test_render_attributes_cache(self):
+        value = AttributesField().from_db_value('{"class": "btn", "title": "a"}')
+        with mock.patch('djangocms_attributes_field.rendering._render', wraps=lambda value, keys: '') as render:
+            self.render(
+                '{% for item in items %}{% render_attributes item %}{% render_attributes item nested %}{% endfor %}',
+                items=[{'class': 'btn'}, {'class': 'btn'}, value], nested={'data-list': [1]},
+            )
+        # Both dicts are equal, nested values are not cached
+        self.assertEqual(render.call_count, 5)
+
+
+@skipUnless(jinja2, 'Jinja2 is not installed')
+class JinjaExtensionTestCase(TestCase):
+
+    def render(self, template, **context):
+        environment = jinja2.Environment(
+            extensions=['djangocms_attributes_field.jinja2.AttributesExtension'], autoescape=True,
+        )
+        return environment.from_string(template).render(**context)
+
+    def test_render_attributes(self):
+        context = {
+            'defaults': {'class': 'btn', 'title': '<b>'},
+            'attributes': {'class': 'btn btn-lg', 'onclick': 'x', 'id': 'a"'},
+        }
+        self.assertEqual(
+            self.render('<a {% render_attributes defaults, attributes %}>', **context),
+            '<a class="btn btn-lg" title="&lt;b&gt;" id="a&quot;">',
+        )
+        self.assertEqual(
+            self.render('<a {{ render_attributes(defaults, attributes, excluded_keys=["title", "id"]) }}>', **context),
+            '<a class="btn btn-lg">',
+        )
+        self.assertEqual(
+            self.render('<a {% render_attributes attributes, excluded_keys="id" %}>', **context),
+            '<a class="btn btn-lg">',
+        )
+
+    def test_render_attributes_cache(self):
+        with mock.patch('djangocms_attributes_field.rendering._render', wraps=lambda value, keys: '') as render:
+            self.render('{% for i in range(3) %}{% render_attributes {"class": "btn"} %}{% endfor %}')
+            self.render('{% for i in range(3) %}{% render_attributes {"class": "btn"} %}{% endfor %}')
+        self.assertEqual(render.call_count, 2)
@@ -20,6 +20,17 @@ class AttributesWidgetsTestCase(TestCase):
         widget.value_from_datadict("", "", None)
         widget.value_omitted_from_data(None, None, None)
 
+    def test_render(self):
+        widget = AttributesWidget(key_attrs={'style': 'width:250px'}, val_attrs={'data-x': '"'})
+        output = widget.render('name', {'title': '<b>', 'class': 'btn'})
+        # One row per item plus the empty template row
+        self.assertEqual(output.count('class="form-row attributes-pair"'), 3)
+        self.assertEqual(output.count('style="width:250px"'), 3)
+        self.assertEqual(output.count('data-x="&quot;"'), 3)
+        self.assertIn('value="&lt;b&gt;"', output)
+        self.assertLess(output.index('value="class"'), output.index('value="title"'))
+        self.assertIn('</div></div><div class="form-row attributes-pair">', output)
+
     def test_media_property(self):
         from djangocms_attributes_field.widgets import _inline_code
 
@@ -46,3 +57,34 @@ class AttributesWidgetsTestCase(TestCase):
         # Reset inline code for other tests
         self.assertIn("<script>", widgets._inline_code)
         self.assertIn("<style>", widgets._inline_code)
+
+    def test_inline_code_once_per_request(self):
+        from django.core.signals import request_finished, request_started
+        from django.db import close_old_connections
+
+        from djangocms_attributes_field import widgets
+
+        inline_code = widgets._inline_code
+        widgets._inline_code = '<style></style><script></script>'
+        # Like the test client, keep the database connection of the test case
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            widget = AttributesWidget()
+            # Outside of requests, every widget carries the code
+            self.assertIn('<script>', widget.render('a', {}))
+            self.assertIn('<script>', widget.render('b', {}))
+
+            request_started.send(sender=self.__class__)
+            self.assertIn('<script>', widget.render('a', {}))
+            self.assertNotIn('<script>', widget.render('b', {}))
+            request_finished.send(sender=self.__class__)
+
+            request_started.send(sender=self.__class__)
+            self.assertIn('<script>', widget.render('a', {}))
+            request_finished.send(sender=self.__class__)
+            self.assertIn('<script>', widget.render('b', {}))
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+            widgets._inline_code = inline_code